@@ -0,0 +1,157 @@
+"""
+Wipe Engine Benchmarks
+Micro-benchmarks for the overwrite engine. Run one with:
+    python bench_wipe.py <name> [size_mb]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import fnmatch
+import tempfile
+
+from wipe_engine import MIB, BLOCK_SLACK, OverwriteEngine, make_random_source, RANDOM_SOURCES
+from wipe_patterns import PatternMatcher
+from wipe_schedules import pattern_schedule
+
+
+def _report(label, nbytes, elapsed):
+    rate = nbytes / elapsed / (1024 ** 3) if elapsed > 0 else float("inf")
+    print(f"  {label:<20} {nbytes / MIB:>8.0f} MiB in {elapsed:6.3f}s  = {rate:6.2f} GiB/s")
+    return rate
+
+
+def bench_random_source(size_mb=1024, chunk_size=4 * MIB):
+    """Compare how fast each random source fills an engine-sized buffer"""
+    print(f"Random pass data sources ({chunk_size // MIB} MiB chunks)")
+    buffer = memoryview(bytearray(chunk_size + BLOCK_SLACK))
+    total = size_mb * MIB
+    rates = {}
+    for name in RANDOM_SOURCES:
+        source = make_random_source(name, chunk_size)
+        source.start_pass()
+        done = 0
+        start = time.perf_counter()
+        while done < total:
+            n = min(chunk_size, total - done)
+            source.fill(buffer, n)
+            done += n
+        rates[name] = _report(name, total, time.perf_counter() - start)
+    if rates.get("urandom"):
+        print(f"  aes-ctr speedup: {rates['aes-ctr'] / rates['urandom']:.1f}x")
+    return rates
+
+
+def bench_fixed_pattern(size_mb=1024, chunk_size=MIB):
+    """
+    Compare a zeros pass written with the per-buffer write loop against the
+    pwritev fast path, in syscalls per GiB and throughput. The file lives in
+    the current directory so the filesystem under test can be chosen.
+    """
+    print(f"Fixed-pattern pass over {size_mb} MiB ({chunk_size // MIB} MiB pattern buffers)")
+    total = size_mb * MIB
+    schedule = pattern_schedule("zeros", 1)
+    results = {}
+    fd, path = tempfile.mkstemp(prefix="bench_wipe_", dir=".")
+    try:
+        os.ftruncate(fd, total)
+        os.close(fd)
+        for label, vectored in (("write loop", False), ("pwritev", True)):
+            engine = OverwriteEngine(chunk_size, durability="file", vectored=vectored)
+            # Warm-up pass so both runs overwrite allocated blocks
+            engine.overwrite_file(path, remove=False, length=total, schedule=schedule, sparse=False)
+            engine.write_calls = 0
+            start = time.perf_counter()
+            engine.overwrite_file(path, remove=False, length=total, schedule=schedule, sparse=False)
+            rate = _report(label, total, time.perf_counter() - start)
+            calls = engine.write_calls * (1024 ** 3) / total
+            print(f"  {'':<20} {calls:>8.0f} syscalls/GiB")
+            results[label] = (rate, calls)
+    finally:
+        os.remove(path)
+    loop, vec = results["write loop"], results["pwritev"]
+    print(f"  pwritev: {loop[1] / vec[1]:.0f}x fewer syscalls, {vec[0] / loop[0]:.2f}x throughput")
+    return results
+
+
+def _naive_matches(patterns, root):
+    """The per-file, per-pattern fnmatch loop the matcher replaced"""
+    matches = []
+    for dirpath, dirs, files in os.walk(root):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            for pat in patterns:
+                if fnmatch.fnmatch(name, pat) or fnmatch.fnmatch(path, pat):
+                    matches.append(path)
+                    break
+    return matches
+
+
+def bench_glob_matcher(files_k=200, n_patterns=50, disk_files_k=20):
+    """
+    Match n_patterns globs against a synthetic tree: first files_k thousand
+    in-memory paths (matching cost alone), then a disk_files_k thousand file
+    tree walked with anchored patterns (matching plus directory pruning).
+    """
+    rng = random.Random(0)
+    exts = [f".e{i}" for i in range(200)]
+    patterns = [f"*{e}" for e in rng.sample(exts, n_patterns * 3 // 5)]
+    patterns += [f"f{rng.randrange(1000)}*" for _ in range(n_patterns // 5)]
+    patterns += [f"*/d{rng.randrange(500)}/*" for _ in range(n_patterns - len(patterns))]
+    root = "/mnt/usb"
+    paths = []
+    for i in range(files_k * 1000):
+        name = f"f{rng.randrange(100000)}{rng.choice(exts)}"
+        paths.append((os.path.join(root, f"d{i % 500}", f"s{i % 7}", name), name))
+
+    print(f"Glob matching: {len(paths)} paths x {len(patterns)} patterns")
+    start = time.perf_counter()
+    naive = sum(1 for path, name in paths
+                if any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(path, p) for p in patterns))
+    naive_time = time.perf_counter() - start
+    matcher = PatternMatcher(patterns, root)
+    start = time.perf_counter()
+    compiled = sum(1 for path, name in paths if matcher.match(path, name))
+    compiled_time = time.perf_counter() - start
+    assert naive == compiled, (naive, compiled)
+    print(f"  {'fnmatch loop':<20} {naive_time:7.3f}s  ({naive} matches)")
+    print(f"  {'compiled matcher':<20} {compiled_time:7.3f}s  = {naive_time / compiled_time:.0f}x faster")
+
+    tree = tempfile.mkdtemp(prefix="bench_glob_")
+    try:
+        dirs = ["DCIM/100CANON"] + [f"data/d{i}" for i in range(99)]
+        for i in range(disk_files_k * 1000):
+            d = os.path.join(tree, dirs[i % len(dirs)])
+            os.makedirs(d, exist_ok=True)
+            open(os.path.join(d, f"f{i}.jpg"), "w").close()
+        anchored = ["DCIM/**", "DCIM/*/*.raw"]
+        print(f"Tree walk: {disk_files_k * 1000} files, patterns {anchored}")
+        # The fnmatch loop never matched relative patterns, so time it with their absolute form
+        absolute = [os.path.join(tree, p) for p in anchored]
+        start = time.perf_counter()
+        naive = len(_naive_matches(absolute, tree))
+        naive_time = time.perf_counter() - start
+        start = time.perf_counter()
+        compiled = len(list(PatternMatcher(anchored, tree).walk()))
+        compiled_time = time.perf_counter() - start
+        assert naive == compiled, (naive, compiled)
+        print(f"  {'walk + fnmatch':<20} {naive_time:7.3f}s  ({naive} matches)")
+        print(f"  {'pruned walk':<20} {compiled_time:7.3f}s  = {naive_time / compiled_time:.0f}x faster")
+    finally:
+        shutil.rmtree(tree, ignore_errors=True)
+
+
+BENCHMARKS = {
+    "random-source": bench_random_source,
+    "fixed-pattern": bench_fixed_pattern,
+    "glob-matcher": bench_glob_matcher,
+}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(f"Usage: python bench_wipe.py <{'|'.join(BENCHMARKS)}> [size_mb]")
+        sys.exit(1)
+    args = [int(a) for a in sys.argv[2:]]
+    BENCHMARKS[sys.argv[1]](*args)
@@ -0,0 +1,145 @@
+"""
+Content Classifier
+Identifies sensitive file types from their leading bytes, so a renamed PDF
+or an extensionless SQLite database is scored by what it is. Each file costs
+one capped os.pread; large batches are split across a small thread pool and
+results are cached per (dev, inode, mtime, size).
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+HEADER_BYTES = 4096
+CONTENT_WORKERS = int(os.getenv("CONTENT_SCAN_WORKERS", "8"))
+# Files per pool task; smaller batches are read by the calling thread
+CONTENT_BATCH = 256
+CACHE_SIZE = int(os.getenv("CONTENT_CACHE_SIZE", "200000"))
+
+# (content type, risk level, regex matched at offset 0 of the header)
+MAGIC = [
+    ("pdf", "high", rb"%PDF-"),
+    ("ole2", "high", rb"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1"),          # .doc / .xls / .ppt
+    ("sqlite", "high", rb"SQLite format 3\x00"),
+    ("pem", "high", rb"\s{0,64}-----BEGIN [A-Z0-9 ]*(?:PRIVATE KEY|CERTIFICATE)-----"),
+    ("zip", "medium", rb"PK\x03\x04"),
+    ("rar", "medium", rb"Rar!\x1A\x07"),
+    ("jpeg", "medium", rb"\xFF\xD8\xFF"),
+    ("png", "medium", rb"\x89PNG\r\n\x1A\n"),
+    ("gif", "medium", rb"GIF8[79]a"),
+    ("mp4", "medium", rb".{4}ftyp"),
+    ("avi", "medium", rb"RIFF.{4}AVI "),
+]
+_MAGIC_RE = re.compile(b"|".join(b"(?P<%s>%s)" % (name.encode(), pattern) for name, _, pattern in MAGIC),
+                       re.DOTALL)
+CONTENT_RISK = {name: level for name, level, _ in MAGIC}
+CONTENT_RISK["ooxml"] = "high"
+# Office Open XML documents are ZIPs whose first entries name these parts
+_OOXML_MARKERS = (b"[Content_Types].xml", b"word/", b"xl/", b"ppt/")
+
+_O_NOATIME = getattr(os, "O_NOATIME", 0)
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
+
+def classify_header(header):
+    """Content type of a file from its first bytes, or None when unrecognised"""
+    m = _MAGIC_RE.match(header)
+    if m is None:
+        return None
+    kind = m.lastgroup
+    if kind == "zip" and any(marker in header for marker in _OOXML_MARKERS):
+        return "ooxml"
+    return kind
+
+
+def _read_header(path):
+    flags = os.O_RDONLY | _O_BINARY
+    try:
+        # Scanning should not dirty every inode on the device with atime updates
+        fd = os.open(path, flags | _O_NOATIME)
+    except PermissionError:
+        fd = os.open(path, flags)
+    try:
+        return os.pread(fd, HEADER_BYTES, 0)
+    finally:
+        os.close(fd)
+
+
+class ContentClassifier:
+    """Thread-safe header classifier with an LRU cache keyed by file identity"""
+
+    def __init__(self, workers=CONTENT_WORKERS, cache_size=CACHE_SIZE):
+        self.cache_size = cache_size
+        self.reads = 0
+        self.cache_hits = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="content")
+
+    @staticmethod
+    def _key(st):
+        return st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _classify_batch(self, batch):
+        kinds = []
+        reads = 0
+        for path, st in batch:
+            if st.st_size == 0:
+                kinds.append(None)
+                continue
+            try:
+                kinds.append(classify_header(_read_header(path)))
+                reads += 1
+            except OSError:
+                kinds.append(None)
+        with self._lock:
+            self.reads += reads
+        return kinds
+
+    def classify_many(self, items):
+        """
+        Content types for a list of (path, stat_result) pairs, in order.
+        Unreadable or unrecognised files come back as None.
+        """
+        results = [None] * len(items)
+        misses = []
+        with self._lock:
+            for i, (path, st) in enumerate(items):
+                key = self._key(st)
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    results[i] = self._cache[key]
+                    self.cache_hits += 1
+                else:
+                    misses.append(i)
+        if not misses:
+            return results
+
+        batches = [misses[i:i + CONTENT_BATCH] for i in range(0, len(misses), CONTENT_BATCH)]
+        if len(batches) == 1:
+            kinds = [self._classify_batch([items[i] for i in batches[0]])]
+        else:
+            kinds = list(self._pool.map(lambda b: self._classify_batch([items[i] for i in b]), batches))
+
+        with self._lock:
+            for batch, batch_kinds in zip(batches, kinds):
+                for i, kind in zip(batch, batch_kinds):
+                    results[i] = kind
+                    self._cache[self._key(items[i][1])] = kind
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return results
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier():
+    """The process-wide classifier, so its cache is shared by every scan"""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = ContentClassifier()
+        return _classifier
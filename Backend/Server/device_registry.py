@@ -0,0 +1,189 @@
+"""
+Removable Device Registry
+Cached mount table used by /devices and the wipe guards. On Linux it parses
+/proc/self/mountinfo and re-reads it only when the kernel reports a mount
+table change; elsewhere it falls back to psutil with a short TTL. Identity
+lookups never touch the (slow) per-device analysis.
+"""
+import os
+import time
+import select
+import platform
+import threading
+
+import psutil
+
+MOUNTINFO_PATH = "/proc/self/mountinfo"
+UUID_DIR = "/dev/disk/by-uuid"
+# Refresh interval where mount changes cannot be polled for
+REGISTRY_TTL = float(os.getenv("DEVICE_REGISTRY_TTL_SECONDS", "2"))
+# Linux mounts at <root>/<user>/<volume> count as removable (udisks automounts)
+REMOVABLE_ROOTS = ("/media",)
+
+
+class MountEntry:
+    """One mounted filesystem: its source device, mountpoint, type and options"""
+
+    __slots__ = ("source", "mountpoint", "fstype", "options")
+
+    def __init__(self, source, mountpoint, fstype, options):
+        self.source = source
+        self.mountpoint = mountpoint
+        self.fstype = fstype
+        self.options = options
+
+    @property
+    def block_device(self):
+        return self.source if self.source.startswith("/dev/") else None
+
+
+def _uuids_by_device(uuid_dir=UUID_DIR):
+    """Resolved block device path -> filesystem UUID, from udev's by-uuid links"""
+    uuids = {}
+    try:
+        for name in os.listdir(uuid_dir):
+            uuids[os.path.realpath(os.path.join(uuid_dir, name))] = name
+    except OSError:
+        pass
+    return uuids
+
+
+def _unescape(field):
+    """mountinfo escapes space, tab, newline and backslash as \\ooo octal"""
+    if "\\" not in field:
+        return field
+    out, i = [], 0
+    while i < len(field):
+        if field[i] == "\\" and i + 3 < len(field) and field[i + 1:i + 4].isdigit():
+            out.append(chr(int(field[i + 1:i + 4], 8)))
+            i += 4
+        else:
+            out.append(field[i])
+            i += 1
+    return "".join(out)
+
+
+def parse_mountinfo(text):
+    """
+    Parse /proc/<pid>/mountinfo into MountEntry objects.
+
+    Each line is "id parent major:minor root mountpoint options [optional...] -
+    fstype source superoptions"; the optional fields end at the lone "-".
+    """
+    entries = []
+    for line in text.splitlines():
+        fields = line.split(" ")
+        try:
+            sep = fields.index("-", 6)
+            mountpoint, options = fields[4], fields[5]
+            fstype, source = fields[sep + 1], fields[sep + 2]
+        except (ValueError, IndexError):
+            continue
+        entries.append(MountEntry(_unescape(source), _unescape(mountpoint), fstype, options))
+    return entries
+
+
+class DeviceRegistry:
+    """
+    Thread-safe cache of the mount table.
+
+    /proc/self/mountinfo raises POLLPRI whenever a filesystem is mounted or
+    unmounted, so checking for a change is one non-blocking poll() and the
+    table is only parsed again when it actually changed.
+    """
+
+    def __init__(self, mountinfo=MOUNTINFO_PATH, ttl=REGISTRY_TTL):
+        self.ttl = ttl
+        self.system = platform.system()
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._mounts = None
+        self._uuids = None
+        self._loaded = 0.0
+        self._file = None
+        self._poll = None
+        if self.system == "Linux" and hasattr(select, "poll"):
+            try:
+                self._file = open(mountinfo, "rb", buffering=0)
+                self._poll = select.poll()
+                self._poll.register(self._file, select.POLLPRI | select.POLLERR)
+            except OSError as e:
+                print(f"Mount table polling unavailable, using {ttl}s refreshes: {e}")
+                self._file = self._poll = None
+
+    def _stale(self):
+        if self._mounts is None:
+            return True
+        if self._poll is not None:
+            # Drains the change event, so the re-read below picks up everything up to now
+            return bool(self._poll.poll(0))
+        return time.monotonic() - self._loaded >= self.ttl
+
+    def _load(self):
+        if self._file is not None:
+            self._file.seek(0)
+            return parse_mountinfo(self._file.read().decode("utf-8", "surrogateescape"))
+        return [MountEntry(p.device, p.mountpoint, p.fstype, p.opts)
+                for p in psutil.disk_partitions(all=self.system != "Windows")]
+
+    def mounts(self):
+        """Mountpoint -> MountEntry for every current mount (the last one wins when stacked)"""
+        with self._lock:
+            if self._stale():
+                self._mounts = {e.mountpoint: e for e in self._load()}
+                self._uuids = None
+                self._loaded = time.monotonic()
+                self.refreshes += 1
+            return self._mounts
+
+    def _is_removable(self, entry):
+        mp = entry.mountpoint
+        if self.system == "Windows":
+            return "removable" in entry.options.lower()
+        if self.system == "Darwin":
+            parent, name = os.path.split(mp.rstrip("/"))
+            return parent == "/Volumes" and not name.startswith(".")
+        for root in REMOVABLE_ROOTS:
+            rel = os.path.relpath(mp, root)
+            if not rel.startswith("..") and rel.count(os.sep) == 1:
+                return True
+        return False
+
+    def removable(self):
+        """Identity of every removable mount: device name, mountpoint and block device"""
+        devices = []
+        for entry in self.mounts().values():
+            if self._is_removable(entry):
+                name = entry.source if self.system == "Windows" else os.path.basename(entry.mountpoint)
+                devices.append({"device": name, "mountpoint": entry.mountpoint,
+                                "block_device": entry.block_device})
+        return devices
+
+    def is_removable(self, mountpoint):
+        entry = self.mounts().get(os.path.normpath(mountpoint))
+        return entry is not None and self._is_removable(entry)
+
+    def filesystem_id(self, mountpoint):
+        """
+        Stable identity of the filesystem mounted at a mountpoint: its UUID
+        when udev knows it, else the source device, else the mountpoint.
+        """
+        mounts = self.mounts()
+        entry = mounts.get(os.path.normpath(mountpoint))
+        if entry is None:
+            return f"mount:{os.path.normpath(mountpoint)}"
+        if entry.block_device:
+            with self._lock:
+                if self._uuids is None:
+                    self._uuids = _uuids_by_device()
+                uuid = self._uuids.get(os.path.realpath(entry.block_device))
+            if uuid:
+                return f"uuid:{uuid}"
+            return f"dev:{entry.block_device}"
+        return f"mount:{entry.mountpoint}"
+
+    def block_device(self, mountpoint):
+        """Source device mounted at a mountpoint (symlinks resolved), or None"""
+        mounts = self.mounts()
+        entry = mounts.get(os.path.normpath(mountpoint)) or mounts.get(os.path.realpath(mountpoint))
+        return entry.source if entry is not None else None
@@ -6,6 +6,8 @@ from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from wipe_engine import OverwriteEngine
+from wipe_schedules import get_schedule
 
 def generate_keys():
     if not os.path.exists("private_key.pem") or not os.path.exists("public_key.pem"):
@@ -27,19 +29,12 @@ def generate_keys():
         print("🔑 RSA key pair generated.")
 
 
-def wipe_file(filepath, passes=3):
+def wipe_file(filepath, passes=3, engine=None, schedule=None):
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"{filepath} not found")
 
-    file_size = os.path.getsize(filepath)
-    with open(filepath, "r+b") as f:
-        for p in range(passes):
-            f.seek(0)
-            random_data = os.urandom(file_size)
-            f.write(random_data)
-            f.flush()
-            os.fsync(f.fileno())
-    os.remove(filepath)
+    engine = engine or OverwriteEngine()
+    engine.overwrite_file(filepath, passes, schedule=get_schedule(schedule, passes) if schedule else None)
     return True
 
 
@@ -0,0 +1,312 @@
+"""
+PII / Secret Content Scanner
+Streams text-like files in chunks through a compiled set of detectors (card
+numbers with Luhn, Aadhaar with Verhoeff, PAN, US SSN, private keys, AWS
+keys) on a process pool, stopping a file early once it has enough hits
+"""
+import os
+import re
+import time
+import threading
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+PII_WORKERS = int(os.getenv("PII_SCAN_WORKERS", "0")) or os.cpu_count() or 1
+PII_TIME_BUDGET = float(os.getenv("PII_SCAN_BUDGET_SECONDS", "30"))
+# Only the first PII_MAX_FILE_MB of a file are scanned
+PII_MAX_FILE_BYTES = int(os.getenv("PII_MAX_FILE_MB", "64")) * 1024 * 1024
+# One hit proves a file is sensitive; a few more make the report useful
+PII_MAX_HITS = 16
+PII_CHUNK = 1024 * 1024
+# Longest possible match, so one straddling a chunk boundary is seen whole next time
+PII_OVERLAP = 128
+# Bytes kept before the first new position, for the boundary checks
+_CONTEXT = 8
+# Files handed to a worker per task, up to this many bytes
+_BATCH_BYTES = 16 * 1024 * 1024
+_BATCH_FILES = 64
+
+PII_EXTENSIONS = {".txt", ".log", ".csv", ".tsv", ".json", ".xml", ".yaml", ".yml", ".ini", ".cfg",
+                  ".conf", ".env", ".sql", ".md", ".html", ".htm", ".eml", ".pem", ".key", ""}
+
+# Detectors run on a class view of each chunk (digits -> "0", letters ->
+# "A"/"a", space and "-" kept, everything else "."), so every pattern starts
+# with a literal and the regex engine can skip ahead with a fast prefix
+# search. A single alternation of character-class patterns over the raw
+# bytes scans at a few MB/s; this set keeps up with the disk.
+_CLASSES = bytes(
+    ord("0") if 48 <= i <= 57 else ord("A") if 65 <= i <= 90 else ord("a") if 97 <= i <= 122
+    else i if i in b" -" else ord(".")
+    for i in range(256)
+)
+_CLASS_DETECTORS = [
+    # Cards and Aadhaar: 12-19 digits in a row, or grouped 4-4-4[-4[-3]] / 4-6-4[5] with one separator
+    ("digits", re.compile(rb"0000(?:0{8,15}|(?P<s>[ -])(?:0000(?P=s)0000(?:(?P=s)0000(?:(?P=s)000)?)?"
+                          rb"|000000(?P=s)00000?))(?!0|[ -]0)"), b"0"),
+    ("ssn", re.compile(rb"000-00-0000(?![0-])"), b"0-"),
+    ("pan", re.compile(rb"AAAAA0000A(?![A0a])"), b"A0a"),
+]
+_RAW_DETECTORS = [
+    ("private_key", re.compile(rb"-----BEGIN (?:[A-Z0-9]{1,16} ){0,3}PRIVATE KEY-----"), b""),
+    ("aws_access_key", re.compile(rb"(?:AKIA|ASIA)[A-Z0-9]{16}(?![A-Z0-9])"), b"ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"),
+    # One pattern per spelling: an alternation loses the literal-prefix search
+    ("aws_secret_key", re.compile(rb"aws_secret_access_key[\"']?\s*[:=]\s*[\"']?[A-Za-z0-9/+=]{40}"), b""),
+    ("aws_secret_key", re.compile(rb"AWS_SECRET_ACCESS_KEY[\"']?\s*[:=]\s*[\"']?[A-Za-z0-9/+=]{40}"), b""),
+]
+PII_TYPES = ("card", "aadhaar", "pan", "ssn", "private_key", "aws_access_key", "aws_secret_key")
+
+# Fourth letter of a PAN is the holder type
+_PAN_ENTITY = b"PCHFATBLJG"
+
+
+def luhn_valid(digits):
+    total = 0
+    for i, ch in enumerate(reversed(digits)):
+        d = ch - 48
+        if i % 2:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return total % 10 == 0
+
+
+# Verhoeff tables (dihedral group D5)
+_VD = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], [1, 2, 3, 4, 0, 6, 7, 8, 9, 5], [2, 3, 4, 0, 1, 7, 8, 9, 5, 6],
+    [3, 4, 0, 1, 2, 8, 9, 5, 6, 7], [4, 0, 1, 2, 3, 9, 5, 6, 7, 8], [5, 9, 8, 7, 6, 0, 4, 3, 2, 1],
+    [6, 5, 9, 8, 7, 1, 0, 4, 3, 2], [7, 6, 5, 9, 8, 2, 1, 0, 4, 3], [8, 7, 6, 5, 9, 3, 2, 1, 0, 4],
+    [9, 8, 7, 6, 5, 4, 3, 2, 1, 0],
+]
+_VP = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], [1, 5, 7, 6, 2, 8, 3, 0, 9, 4], [5, 8, 0, 3, 7, 9, 6, 1, 4, 2],
+    [8, 9, 1, 6, 0, 4, 3, 5, 2, 7], [9, 4, 5, 3, 1, 2, 6, 8, 7, 0], [4, 2, 8, 6, 5, 7, 3, 9, 0, 1],
+    [2, 7, 9, 3, 8, 0, 6, 4, 1, 5], [7, 0, 4, 6, 9, 1, 3, 2, 5, 8],
+]
+
+
+def verhoeff_valid(digits):
+    check = 0
+    for i, ch in enumerate(reversed(digits)):
+        check = _VD[check][_VP[i % 8][ch - 48]]
+    return check == 0
+
+
+# Digit grouping of numbers written with separators ("4111 1111 1111 1111")
+_CARD_GROUPS = {(4, 4, 4, 4), (4, 6, 5), (4, 6, 4), (4, 4, 4, 4, 3)}
+_AADHAAR_GROUPS = {(4, 4, 4)}
+
+
+def _classify_digits(text):
+    """card / aadhaar for a run of digits with optional separators, or None"""
+    seps = set(text.translate(None, b"0123456789"))
+    if len(seps) > 1:
+        return None
+    digits = text
+    groups = None
+    if seps:
+        parts = text.split(bytes(seps))
+        groups = tuple(len(p) for p in parts)
+        digits = b"".join(parts)
+    if len(digits) == 12:
+        if groups is not None and groups not in _AADHAAR_GROUPS:
+            return None
+        if digits[0] >= ord("2") and verhoeff_valid(digits):
+            return "aadhaar"
+        return None
+    if groups is not None and groups not in _CARD_GROUPS:
+        return None
+    if 13 <= len(digits) <= 19 and ord("2") <= digits[0] <= ord("6") and luhn_valid(digits):
+        return "card"
+    return None
+
+
+def _valid_ssn(text):
+    area, group, serial = text[:3], text[4:6], text[7:]
+    return area not in (b"000", b"666") and area[0] != ord("9") and group != b"00" and serial != b"0000"
+
+
+def scan_buffer(buf, lo, limit, hits, max_hits):
+    """
+    Count detector hits that start in buf[lo:limit] into `hits`.
+    Returns False once max_hits is reached.
+    """
+    view = buf.translate(_CLASSES)
+    for name, regex, before in _CLASS_DETECTORS:
+        for m in regex.finditer(view, lo):
+            start = m.start()
+            if start >= limit:
+                break
+            if start and view[start - 1] in before:
+                continue
+            text = buf[start:m.end()]
+            if name == "digits":
+                kind = _classify_digits(text)
+            elif name == "ssn":
+                kind = "ssn" if _valid_ssn(text) else None
+            else:
+                kind = "pan" if text[3] in _PAN_ENTITY else None
+            if kind:
+                hits[kind] += 1
+                if sum(hits.values()) >= max_hits:
+                    return False
+    for name, regex, before in _RAW_DETECTORS:
+        for m in regex.finditer(buf, lo):
+            start = m.start()
+            if start >= limit:
+                break
+            if before and start and buf[start - 1] in before:
+                continue
+            hits[name] += 1
+            if sum(hits.values()) >= max_hits:
+                return False
+    return True
+
+
+def scan_file(path, max_bytes=PII_MAX_FILE_BYTES, max_hits=PII_MAX_HITS):
+    """
+    Stream one file through the detectors.
+
+    Returns:
+        tuple: (hits Counter, bytes scanned)
+    """
+    hits = Counter()
+    scanned = 0
+    carry = b""
+    lo = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(min(PII_CHUNK, max_bytes - scanned))
+            scanned += len(chunk)
+            final = len(chunk) < PII_CHUNK or scanned >= max_bytes
+            buf = carry + chunk
+            # Matches starting in the last PII_OVERLAP bytes wait for the next chunk
+            limit = len(buf) if final else len(buf) - PII_OVERLAP
+            if not scan_buffer(buf, lo, limit, hits, max_hits) or final:
+                return hits, scanned
+            keep = max(0, limit - _CONTEXT)
+            carry = buf[keep:]
+            lo = limit - keep
+
+
+def _scan_batch(paths, max_bytes, max_hits):
+    results = []
+    for path in paths:
+        try:
+            hits, scanned = scan_file(path, max_bytes, max_hits)
+        except OSError:
+            continue
+        results.append((path, dict(hits), scanned))
+    return results
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """
+    The process-wide worker pool. Workers are spawned, not forked (the server
+    process is multi-threaded), and a spawned worker re-imports the script the
+    parent was launched as, so that script must not start services at import;
+    server.py starts them in startup handlers.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PII_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_pool(pool):
+    """Drop a broken pool so the next scan starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _batches(files):
+    batch, size = [], 0
+    for path, file_size in files:
+        batch.append(path)
+        size += min(file_size, PII_MAX_FILE_BYTES)
+        if size >= _BATCH_BYTES or len(batch) >= _BATCH_FILES:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def scan_files(files, time_budget=PII_TIME_BUDGET, max_bytes=PII_MAX_FILE_BYTES, max_hits=PII_MAX_HITS):
+    """
+    Scan (path, size) pairs on the process pool.
+
+    At most two batches per worker are in flight, so memory stays flat for
+    any number of files; once the time budget runs out no more batches are
+    handed out and the summary says it is incomplete.
+
+    If a worker dies the pool is replaced for the next scan, and this one
+    returns what it had with complete=False and an "error".
+
+    Returns:
+        dict: totals, hits per type, and the per-file hits of files that had any
+    """
+    started = time.monotonic()
+    deadline = started + time_budget if time_budget else None
+    pool = _get_pool()
+    batches = _batches(files)
+    pending = set()
+    complete = True
+    totals = Counter()
+    matches = {}
+    files_scanned = bytes_scanned = 0
+    error = None
+
+    def submit():
+        nonlocal complete
+        while len(pending) < 2 * PII_WORKERS:
+            if deadline is not None and time.monotonic() > deadline:
+                complete = False
+                return
+            batch = next(batches, None)
+            if batch is None:
+                return
+            pending.add(pool.submit(_scan_batch, batch, max_bytes, max_hits))
+
+    try:
+        submit()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                for path, hits, scanned in future.result():
+                    files_scanned += 1
+                    bytes_scanned += scanned
+                    if hits:
+                        matches[path] = hits
+                        totals.update(hits)
+            submit()
+    except BrokenProcessPool as e:
+        print(f"[pii] Scan worker died, restarting the pool: {e}")
+        _discard_pool(pool)
+        error = str(e) or "scan worker died"
+        complete = False
+    if next(batches, None) is not None:
+        complete = False
+
+    elapsed = time.monotonic() - started
+    return {
+        "files_scanned": files_scanned,
+        "bytes_scanned": bytes_scanned,
+        "files_with_hits": len(matches),
+        "hits": dict(totals),
+        "matches": matches,
+        "complete": complete,
+        "elapsed": round(elapsed, 3),
+        "throughput": round(bytes_scanned / elapsed) if elapsed > 0 else 0,
+        **({"error": error} if error else {}),
+    }
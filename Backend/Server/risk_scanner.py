@@ -0,0 +1,464 @@
+"""
+Device Risk Scanner
+Scores how sensitive the files on a device look from their extensions.
+Directories are listed with os.scandir by a pool of worker threads, using
+the dirent type so files are only stat'ed when their sizes are wanted.
+The "sample" mode instead estimates the score from random descents.
+With content=True files are also classified by their leading bytes, and
+with pii=True text-like files are searched for personal data and secrets.
+"""
+import os
+import math
+import time
+import heapq
+import random
+import threading
+from collections import Counter
+
+from content_classifier import CONTENT_RISK, get_classifier
+from pii_scanner import PII_EXTENSIONS, PII_TIME_BUDGET, scan_files
+
+HIGH_RISK_EXT = {".docx", ".doc", ".pdf", ".xls", ".xlsx", ".ppt", ".pptx", ".db", ".key", ".pem"}
+MEDIUM_RISK_EXT = {".jpg", ".jpeg", ".png", ".gif", ".mp4", ".avi", ".zip", ".rar"}
+LOW_RISK_EXT = {".txt", ".log", ".tmp"}
+
+RISK_LEVELS = ("high", "medium", "low", "unknown")
+RISK_WEIGHTS = {"high": 5, "medium": 3, "low": 1, "unknown": 0}
+# The score is the (capped) weight sum of a typical window of this many files,
+# so devices with fewer files score exactly as the old first-200-files scan did
+RISK_WINDOW = 200
+SAMPLE_FILES = 20
+
+SCAN_MODES = ("quick", "full", "sample")
+SCAN_WORKERS = int(os.getenv("RISK_SCAN_WORKERS", "8"))
+SCAN_TIME_BUDGET = float(os.getenv("RISK_SCAN_BUDGET_SECONDS", "5"))
+SAMPLE_TIME_BUDGET = float(os.getenv("RISK_SAMPLE_BUDGET_SECONDS", "0.5"))
+SAMPLE_MAX_PROBES = 4096
+CONFIDENCE = 0.95
+_Z = 1.96   # two-sided normal quantile for CONFIDENCE
+# How often (in entries) a long directory listing checks the deadline
+_DEADLINE_CHECK = 4096
+
+
+def risk_level(ext):
+    if ext in HIGH_RISK_EXT:
+        return "high"
+    if ext in MEDIUM_RISK_EXT:
+        return "medium"
+    if ext in LOW_RISK_EXT:
+        return "low"
+    return "unknown"
+
+
+def risk_score(counts):
+    """Score from per-level file counts (which may be estimates)"""
+    total = sum(counts.values())
+    weighted = sum(RISK_WEIGHTS[level] * n for level, n in counts.items())
+    return min(100, int(round(weighted * RISK_WINDOW / max(total, RISK_WINDOW))))
+
+
+class _Tally:
+    """Per-worker counters, merged once the scan is over"""
+
+    def __init__(self):
+        self.ext_count = Counter()
+        self.ext_bytes = Counter()
+        self.level_count = Counter()
+        self.level_bytes = Counter()
+        self.content_count = Counter()
+        self.dirs = 0
+        self.errors = 0
+        self.samples = {level: [] for level in RISK_LEVELS}
+        # (path, size, level) of text-like files, for the PII scan
+        self.pii_candidates = []
+
+    def _pii_candidate(self, entry, ext, level, st=None):
+        if ext not in PII_EXTENSIONS:
+            return
+        try:
+            st = st or entry.stat(follow_symlinks=False)
+        except OSError:
+            self.errors += 1
+            return
+        if st.st_size:
+            self.pii_candidates.append((entry.path, st.st_size, level))
+
+    def scan_dir(self, path, sizes, deadline, classifier=None, pii=False):
+        """Tally one directory; returns its subdirectories and whether it was finished"""
+        subdirs = []
+        files = []
+        finished = True
+        try:
+            with os.scandir(path) as it:
+                for n, entry in enumerate(it):
+                    if deadline is not None and n % _DEADLINE_CHECK == _DEADLINE_CHECK - 1 \
+                            and time.monotonic() > deadline:
+                        finished = False
+                        break
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            files.append(entry)
+                    except OSError:
+                        self.errors += 1
+        except OSError:
+            self.errors += 1
+        if classifier is None:
+            # Levels follow from the extension counts when the scan is merged
+            exts = [os.path.splitext(entry.name)[1].lower() for entry in files]
+            self.ext_count.update(exts)
+            for entry, ext in zip(files, exts):
+                if sizes:
+                    try:
+                        self.ext_bytes[ext] += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        self.errors += 1
+                        continue
+                if pii:
+                    self._pii_candidate(entry, ext, risk_level(ext))
+                sample = self.samples[risk_level(ext)]
+                if len(sample) < SAMPLE_FILES:
+                    sample.append(entry.path)
+        else:
+            # A directory's files are classified together, as one batch of header reads
+            for entry, level, st in _levels(files, True, classifier, self):
+                ext = os.path.splitext(entry.name)[1].lower()
+                self.ext_count[ext] += 1
+                self.level_count[level] += 1
+                if sizes:
+                    self.ext_bytes[ext] += st.st_size
+                    self.level_bytes[level] += st.st_size
+                if pii:
+                    self._pii_candidate(entry, ext, level, st)
+                sample = self.samples[level]
+                if len(sample) < SAMPLE_FILES:
+                    sample.append(entry.path)
+        self.dirs += 1
+        return subdirs, finished
+
+
+def _levels(entries, need_stat, classifier, tally=None):
+    """
+    Yield (entry, risk level, stat or None) for file DirEntries: the content
+    type's level when a classifier recognises the file, else the extension's.
+    """
+    if not need_stat and classifier is None:
+        for entry in entries:
+            yield entry, risk_level(os.path.splitext(entry.name)[1].lower()), None
+        return
+    stats = [None] * len(entries)
+    if need_stat:
+        kept = []
+        for entry in entries:
+            try:
+                kept.append((entry, entry.stat(follow_symlinks=False)))
+            except OSError:
+                if tally is not None:
+                    tally.errors += 1
+        entries = [e for e, _ in kept]
+        stats = [st for _, st in kept]
+    kinds = classifier.classify_many([(e.path, st) for e, st in zip(entries, stats)]) if classifier else None
+    for i, entry in enumerate(entries):
+        kind = kinds[i] if kinds is not None else None
+        if kind is not None:
+            if tally is not None:
+                tally.content_count[kind] += 1
+            level = CONTENT_RISK[kind]
+        else:
+            level = risk_level(os.path.splitext(entry.name)[1].lower())
+        yield entry, level, stats[i]
+
+
+def scan_tree(root, sizes=False, workers=SCAN_WORKERS, time_budget=None, classifier=None, pii=False):
+    """
+    Tally every file under root by extension.
+
+    Workers take directories from a shared stack and push the subdirectories
+    they find. When the time budget runs out the workers stop and the tallies
+    cover only what was listed so far.
+
+    Returns:
+        tuple: (list of per-worker _Tally, complete flag, directories left unscanned)
+    """
+    deadline = time.monotonic() + time_budget if time_budget else None
+    pending = [root]
+    cond = threading.Condition()
+    state = {"active": 0, "stopped": False}
+    tallies = [_Tally() for _ in range(max(1, workers))]
+
+    def work(tally):
+        while True:
+            with cond:
+                while not pending and state["active"] and not state["stopped"]:
+                    cond.wait()
+                if state["stopped"] or not pending:
+                    cond.notify_all()
+                    return
+                if deadline is not None and time.monotonic() > deadline:
+                    state["stopped"] = True
+                    cond.notify_all()
+                    return
+                path = pending.pop()
+                state["active"] += 1
+            subdirs, finished = tally.scan_dir(path, sizes, deadline, classifier, pii)
+            with cond:
+                pending.extend(subdirs)
+                state["active"] -= 1
+                if not finished:
+                    state["stopped"] = True
+                cond.notify_all()
+
+    threads = [threading.Thread(target=work, args=(t,), daemon=True) for t in tallies[1:]]
+    for t in threads:
+        t.start()
+    work(tallies[0])
+    for t in threads:
+        t.join()
+    return tallies, not state["stopped"], len(pending)
+
+
+class _Listing:
+    """File paths and risk levels, per-level file counts and subdirectories of one directory"""
+
+    __slots__ = ("names", "levels", "counts", "subdirs")
+
+    def __init__(self, path, classifier=None):
+        self.counts = dict.fromkeys(RISK_LEVELS, 0)
+        self.subdirs = []
+        files = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            self.subdirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            files.append(entry)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        self.names = []
+        self.levels = []
+        for entry, level, _ in _levels(files, classifier is not None, classifier):
+            self.names.append(entry.path)
+            self.levels.append(level)
+            self.counts[level] += 1
+
+
+def _interval(mean, values, z=_Z):
+    """Normal-approximation interval for the mean of per-probe estimates"""
+    k = len(values)
+    if k < 2:
+        return None
+    sd = math.sqrt(sum((v - mean) ** 2 for v in values) / (k - 1))
+    half = z * sd / math.sqrt(k)
+    return [max(0.0, mean - half), mean + half]
+
+
+def sample_device(root, time_budget=SAMPLE_TIME_BUDGET, max_probes=SAMPLE_MAX_PROBES, rng=None,
+                  classifier=None):
+    """
+    Estimate the risk analysis of root from random root-to-leaf descents.
+
+    Each descent picks one subdirectory uniformly at every level and counts
+    a directory's files times the inverse probability of reaching it, which
+    is an unbiased estimate of the device's file counts per risk level
+    (Knuth's tree-size estimator). Descents repeat until the time budget or
+    max_probes runs out, and the spread between them gives the confidence
+    intervals. Example files come from a weighted reservoir sample, so they
+    are roughly uniform over the device rather than the first ones listed.
+    Listings are cached, and if the descents end up listing every directory
+    the counts are exact. A time_budget of 0 runs all max_probes descents.
+    """
+    rng = rng or random.Random()
+    started = time.monotonic()
+    deadline = started + time_budget if time_budget else None
+    listings = {}
+    frontier = {root}
+    probes = []
+    reservoir = []       # min-heap of (key, path, level), A-Res weighted sampling
+    in_reservoir = set()
+
+    while frontier and len(probes) < max_probes and \
+            (not probes or deadline is None or time.monotonic() < deadline):
+        estimate = dict.fromkeys(RISK_LEVELS, 0.0)
+        path, weight = root, 1
+        while True:
+            listing = listings.get(path)
+            if listing is None:
+                listing = listings[path] = _Listing(path, classifier)
+                frontier.discard(path)
+                frontier.update(d for d in listing.subdirs if d not in listings)
+            for level, n in listing.counts.items():
+                estimate[level] += weight * n
+            if listing.names:
+                # One file stands in for the weight * len(names) files it represents
+                pick = rng.randrange(len(listing.names))
+                name = listing.names[pick]
+                key = rng.random() ** (1.0 / (weight * len(listing.names)))
+                if name not in in_reservoir:
+                    item = (key, name, listing.levels[pick])
+                    if len(reservoir) < SAMPLE_FILES:
+                        heapq.heappush(reservoir, item)
+                        in_reservoir.add(name)
+                    elif key > reservoir[0][0]:
+                        in_reservoir.discard(heapq.heapreplace(reservoir, item)[1])
+                        in_reservoir.add(name)
+            if not listing.subdirs:
+                break
+            weight *= len(listing.subdirs)
+            path = rng.choice(listing.subdirs)
+        probes.append(estimate)
+
+    complete = not frontier
+    by_risk = {}
+    if complete:
+        counts = {level: sum(l.counts[level] for l in listings.values()) for level in RISK_LEVELS}
+        for level in RISK_LEVELS:
+            by_risk[level] = {"count": counts[level], "ci": [counts[level], counts[level]]}
+        score = risk_score(counts)
+        score_ci = [score, score]
+    else:
+        k = len(probes)
+        counts = {level: sum(p[level] for p in probes) / k for level in RISK_LEVELS}
+        for level in RISK_LEVELS:
+            ci = _interval(counts[level], [p[level] for p in probes])
+            by_risk[level] = {"count": int(round(counts[level])),
+                              "ci": [int(round(v)) for v in ci] if ci else None}
+        score = risk_score(counts)
+        # Delta-method interval for the ratio (weight sum / file count) behind the score
+        totals = [sum(p.values()) for p in probes]
+        weights = [sum(RISK_WEIGHTS[level] * p[level] for level in RISK_LEVELS) for p in probes]
+        mean_total = sum(totals) / k
+        score_ci = None
+        if k >= 2 and mean_total > 0:
+            ratio = sum(weights) / k / mean_total
+            residuals = [w - ratio * n for w, n in zip(weights, totals)]
+            se = math.sqrt(sum(r * r for r in residuals) / (k - 1) / k) / mean_total
+            # risk_score() is the mean weight per file times min(files, RISK_WINDOW)
+            window = min(mean_total, RISK_WINDOW)
+            score_ci = [max(0, min(100, int(math.floor((ratio - _Z * se) * window)))),
+                        max(0, min(100, int(math.ceil((ratio + _Z * se) * window))))]
+
+    files = sorted(reservoir, reverse=True)
+    if complete:
+        # Every file was listed, so show the riskiest ones as the full scans do
+        files = [(0, path, level) for level in RISK_LEVELS for l in listings.values()
+                 for path, lvl in zip(l.names, l.levels) if lvl == level][:SAMPLE_FILES]
+    return {
+        "risk_score": score,
+        "risk_score_ci": score_ci,
+        "confidence": CONFIDENCE,
+        "files": [{"file": path, "risk": level} for _, path, level in files],
+        "mode": "sample",
+        "content": classifier is not None,
+        "complete": complete,
+        "files_estimated": int(round(sum(counts.values()))),
+        "probes": len(probes),
+        "dirs_scanned": len(listings),
+        "elapsed": round(time.monotonic() - started, 3),
+        "by_risk": by_risk,
+    }
+
+
+def _pii_findings(tallies, level_count, level_bytes, sizes, time_budget=PII_TIME_BUDGET):
+    """
+    Search the text-like files the walk found for PII and secrets; files
+    with hits count as high risk. Returns the scan summary and their paths.
+    """
+    candidates = [c for t in tallies for c in t.pii_candidates]
+    levels = {path: (size, level) for path, size, level in candidates}
+    result = scan_files([(path, size) for path, size, _ in candidates], time_budget)
+    matches = result.pop("matches")
+    for path in matches:
+        size, level = levels[path]
+        if level == "high":
+            continue
+        level_count[level] -= 1
+        level_count["high"] += 1
+        if sizes:
+            level_bytes[level] -= size
+            level_bytes["high"] += size
+    result["candidates"] = len(candidates)
+    result["matches"] = [{"file": path, "hits": hits} for path, hits in list(matches.items())[:SAMPLE_FILES]]
+    return result, list(matches)
+
+
+def scan_device(root, mode="quick", workers=SCAN_WORKERS, time_budget=None, content=False, pii=False):
+    """
+    Risk analysis of the files under root.
+
+    "quick" counts files per extension from directory listings alone; "full"
+    also stats each file for bytes per extension and risk level; "sample"
+    estimates the score with a confidence interval (see sample_device).
+    time_budget defaults per mode; 0 scans without a limit. With content=True
+    a file's risk level comes from its magic bytes when they are recognised.
+    With pii=True (quick and full only) text-like files are then searched
+    for card numbers, national ids and keys within their own time budget,
+    and files with any hit count as high risk.
+    """
+    if mode not in SCAN_MODES:
+        raise ValueError(f"Unknown scan mode '{mode}'. Use one of: {', '.join(SCAN_MODES)}")
+    classifier = get_classifier() if content else None
+    if mode == "sample":
+        return sample_device(root, SAMPLE_TIME_BUDGET if time_budget is None else time_budget,
+                             classifier=classifier)
+    if time_budget is None:
+        time_budget = SCAN_TIME_BUDGET
+    sizes = mode == "full"
+    started = time.monotonic()
+    tallies, complete, unscanned = scan_tree(root, sizes, workers, time_budget, classifier, pii)
+
+    ext_count, ext_bytes = Counter(), Counter()
+    level_count, level_bytes, content_count = Counter(), Counter(), Counter()
+    samples = {level: [] for level in RISK_LEVELS}
+    for t in tallies:
+        ext_count.update(t.ext_count)
+        ext_bytes.update(t.ext_bytes)
+        level_count.update(t.level_count)
+        level_bytes.update(t.level_bytes)
+        content_count.update(t.content_count)
+        for level in RISK_LEVELS:
+            samples[level].extend(t.samples[level])
+
+    if classifier is None:
+        for ext, count in ext_count.items():
+            level_count[risk_level(ext)] += count
+            level_bytes[risk_level(ext)] += ext_bytes[ext]
+    pii_summary = None
+    if pii:
+        pii_summary, pii_files = _pii_findings(tallies, level_count, level_bytes, sizes)
+        flagged = set(pii_files)
+        for level in RISK_LEVELS:
+            samples[level] = [path for path in samples[level] if path not in flagged]
+        samples["high"] = pii_files[:SAMPLE_FILES] + samples["high"]
+    by_risk = {level: {"count": level_count[level]} for level in RISK_LEVELS}
+    if sizes:
+        for level in RISK_LEVELS:
+            by_risk[level]["bytes"] = level_bytes[level]
+    by_extension = {}
+    for ext, count in ext_count.most_common():
+        by_extension[ext] = {"risk": risk_level(ext), "count": count}
+        if sizes:
+            by_extension[ext]["bytes"] = ext_bytes[ext]
+
+    # Riskiest files first, like the score itself
+    files = [{"file": path, "risk": level} for level in RISK_LEVELS for path in samples[level]]
+    return {
+        "risk_score": risk_score({level: v["count"] for level, v in by_risk.items()}),
+        "files": files[:SAMPLE_FILES],
+        "mode": mode,
+        "content": content,
+        "complete": complete,
+        "files_scanned": sum(ext_count.values()),
+        "dirs_scanned": sum(t.dirs for t in tallies),
+        "dirs_unscanned": unscanned,
+        "errors": sum(t.errors for t in tallies),
+        "elapsed": round(time.monotonic() - started, 3),
+        "by_risk": by_risk,
+        "by_extension": by_extension,
+        **({"by_content": dict(content_count.most_common())} if content else {}),
+        **({"pii": pii_summary} if pii else {}),
+    }
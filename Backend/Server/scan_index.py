@@ -0,0 +1,253 @@
+"""
+Device Scan Index
+Persistent per-filesystem index of files (size, mtime, inode, risk level) in
+SQLite, so /devices answers from the last scan and keeps it current with
+incremental rescans that only re-list directories whose mtime changed
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from risk_scanner import RISK_LEVELS, SAMPLE_FILES, risk_level, risk_score
+
+SCAN_INDEX_PATH = os.getenv("SCAN_INDEX_PATH", "scan_index.sqlite")
+# A device is rescanned in the background at most this often
+SCAN_INDEX_REFRESH_SECONDS = float(os.getenv("SCAN_INDEX_REFRESH_SECONDS", "5"))
+# Changed directories written per transaction during a rescan
+INDEX_BATCH_DIRS = 256
+# Directories modified this close to the scan may change again within the
+# same mtime tick, so their mtime is not trusted until the next rescan
+_MTIME_SLACK_NS = 2 * 10 ** 9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS volumes (
+    fs_id TEXT PRIMARY KEY,
+    mountpoint TEXT NOT NULL,
+    scanned TEXT NOT NULL,
+    analysis TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    fs_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    parent TEXT,
+    mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (fs_id, path)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS files (
+    fs_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    dir TEXT NOT NULL,
+    ext TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    risk TEXT NOT NULL,
+    PRIMARY KEY (fs_id, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_by_dir ON files (fs_id, dir);
+"""
+
+
+class ScanIndex:
+    """
+    SQLite index of every indexed filesystem, keyed by filesystem id plus the
+    path relative to the mountpoint, so a device keeps its index across
+    re-plugs and mountpoint changes.
+
+    A rescan stats every known directory but only lists those whose mtime
+    changed (an entry was added, removed or renamed); the subdirectories of
+    unchanged ones come from the index. In-place edits to a file do not touch
+    its directory, so sizes of such files are refreshed only when their
+    directory next changes.
+    """
+
+    def __init__(self, path=SCAN_INDEX_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # The index is a cache that a rescan can always rebuild
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._analysis = {}
+        self._refreshing = set()
+        self._last_refresh = {}
+
+    def analysis(self, fs_id):
+        """Risk analysis from the last completed scan, or None if never indexed"""
+        with self._lock:
+            if fs_id not in self._analysis:
+                row = self._conn.execute("SELECT analysis FROM volumes WHERE fs_id = ?", (fs_id,)).fetchone()
+                self._analysis[fs_id] = json.loads(row[0]) if row else None
+            analysis = self._analysis[fs_id]
+            refreshing = fs_id in self._refreshing
+        if analysis is None:
+            return None
+        return {**analysis, "refreshing": refreshing}
+
+    def refresh_async(self, fs_id, root, min_interval=SCAN_INDEX_REFRESH_SECONDS):
+        """Start a background rescan unless one is running or the last one is recent"""
+        with self._lock:
+            if fs_id in self._refreshing:
+                return False
+            if time.monotonic() - self._last_refresh.get(fs_id, float("-inf")) < min_interval:
+                return False
+            self._refreshing.add(fs_id)
+        threading.Thread(target=self._refresh_job, args=(fs_id, root), daemon=True).start()
+        return True
+
+    def _refresh_job(self, fs_id, root):
+        try:
+            self.refresh(fs_id, root)
+        except Exception as e:
+            print(f"[scan-index] Rescan of {root} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(fs_id)
+                self._last_refresh[fs_id] = time.monotonic()
+
+    def refresh(self, fs_id, root):
+        """Bring the index for one filesystem up to date and return its analysis"""
+        started = time.monotonic()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, parent, mtime_ns FROM dirs WHERE fs_id = ?", (fs_id,)
+            ).fetchall()
+        stored = {}
+        children = defaultdict(list)
+        for path, parent, mtime_ns in rows:
+            stored[path] = mtime_ns
+            if parent is not None:
+                children[parent].append(path)
+
+        trust_before = time.time_ns() - _MTIME_SLACK_NS
+        stack = [""]
+        seen = set()
+        batch = []
+        listed = 0
+        while stack:
+            rel = stack.pop()
+            full = os.path.join(root, rel) if rel else root
+            try:
+                mtime_ns = os.stat(full).st_mtime_ns
+            except OSError:
+                continue
+            seen.add(rel)
+            if stored.get(rel) == mtime_ns:
+                stack.extend(children.get(rel, ()))
+                continue
+            files, subdirs = self._list_dir(full, rel)
+            listed += 1
+            stack.extend(subdirs)
+            parent = os.path.dirname(rel) if rel else None
+            batch.append((rel, parent, mtime_ns if mtime_ns < trust_before else -1, files))
+            if len(batch) >= INDEX_BATCH_DIRS:
+                self._write_dirs(fs_id, batch)
+                batch = []
+        self._write_dirs(fs_id, batch)
+
+        removed = [path for path in stored if path not in seen]
+        if removed:
+            with self._lock:
+                self._conn.execute("BEGIN")
+                self._conn.executemany("DELETE FROM files WHERE fs_id = ? AND dir = ?",
+                                       [(fs_id, path) for path in removed])
+                self._conn.executemany("DELETE FROM dirs WHERE fs_id = ? AND path = ?",
+                                       [(fs_id, path) for path in removed])
+                self._conn.execute("COMMIT")
+
+        with self._lock:
+            previous = self._analysis.get(fs_id)
+        if previous is not None and not listed and not removed:
+            # Nothing changed: keep the cached totals but report this refresh's work
+            analysis = {**previous, "dirs_scanned": len(seen), "dirs_listed": 0,
+                        "elapsed": round(time.monotonic() - started, 3)}
+            with self._lock:
+                self._analysis[fs_id] = analysis
+            return analysis
+        analysis = self._summarize(fs_id, root, len(seen), listed, time.monotonic() - started)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO volumes (fs_id, mountpoint, scanned, analysis) VALUES (?, ?, ?, ?)",
+                (fs_id, root, analysis["indexed"], json.dumps(analysis))
+            )
+            self._analysis[fs_id] = analysis
+        return analysis
+
+    @staticmethod
+    def _list_dir(full, rel):
+        files, subdirs = [], []
+        try:
+            with os.scandir(full) as it:
+                for entry in it:
+                    try:
+                        path = os.path.join(rel, entry.name) if rel else entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(path)
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            ext = os.path.splitext(entry.name)[1].lower()
+                            files.append((path, ext, st.st_size, st.st_mtime_ns, st.st_ino, risk_level(ext)))
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"[scan-index] Cannot list {full}: {e}")
+        return files, subdirs
+
+    def _write_dirs(self, fs_id, batch):
+        """Replace the file rows of re-listed directories, one transaction per batch"""
+        if not batch:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("DELETE FROM files WHERE fs_id = ? AND dir = ?",
+                                   [(fs_id, rel) for rel, _, _, _ in batch])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (fs_id, path, dir, ext, size, mtime_ns, inode, risk) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(fs_id, path, rel, ext, size, mtime_ns, ino, risk)
+                 for rel, _, _, files in batch for path, ext, size, mtime_ns, ino, risk in files]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO dirs (fs_id, path, parent, mtime_ns) VALUES (?, ?, ?, ?)",
+                [(fs_id, rel, parent, mtime_ns) for rel, parent, mtime_ns, _ in batch]
+            )
+            self._conn.execute("COMMIT")
+
+    def _summarize(self, fs_id, root, dirs, listed, elapsed):
+        """Risk analysis in the shape of risk_scanner.scan_device, from the index"""
+        with self._lock:
+            by_ext = self._conn.execute(
+                "SELECT ext, risk, COUNT(*), COALESCE(SUM(size), 0) FROM files WHERE fs_id = ? "
+                "GROUP BY ext ORDER BY COUNT(*) DESC", (fs_id,)
+            ).fetchall()
+            samples = {}
+            for level in RISK_LEVELS:
+                samples[level] = [row[0] for row in self._conn.execute(
+                    "SELECT path FROM files WHERE fs_id = ? AND risk = ? LIMIT ?", (fs_id, level, SAMPLE_FILES)
+                )]
+        by_risk = {level: {"count": 0, "bytes": 0} for level in RISK_LEVELS}
+        by_extension = {}
+        for ext, level, count, size in by_ext:
+            by_risk[level]["count"] += count
+            by_risk[level]["bytes"] += size
+            by_extension[ext] = {"risk": level, "count": count, "bytes": size}
+        files = [{"file": os.path.join(root, path), "risk": level}
+                 for level in RISK_LEVELS for path in samples[level]]
+        return {
+            "risk_score": risk_score({level: v["count"] for level, v in by_risk.items()}),
+            "files": files[:SAMPLE_FILES],
+            "mode": "index",
+            "complete": True,
+            "files_scanned": sum(v["count"] for v in by_risk.values()),
+            "dirs_scanned": dirs,
+            "dirs_listed": listed,
+            "elapsed": round(elapsed, 3),
+            "indexed": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "by_risk": by_risk,
+            "by_extension": by_extension,
+        }
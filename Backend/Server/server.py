@@ -3,17 +3,18 @@ import shutil
 import platform
 import psutil
 import subprocess
-from fastapi import FastAPI, HTTPException, UploadFile, File, Request, Depends
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel
 from typing import Union, List, Optional
-import secrets
 from datetime import datetime
 import uuid
 import json
+import asyncio
 import tempfile
+import functools
 
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
@@ -26,40 +27,55 @@ load_dotenv(override=False)
 
 # --- Import auth utils ---
 from auth_utils import verify_firebase_token, verify_optional_token
+from device_registry import DeviceRegistry
+from risk_scanner import SCAN_MODES, scan_device
+from scan_index import ScanIndex
+from smart_health import SmartProber, device_serial, whole_disk
+from wipe_engine import (MIB, FREE_SPACE_RESERVE, WipeExecutor, allocated_size, device_size, iter_files,
+                         pipelined, resolve_chunk_size)
+from wipe_jobs import JobManager, JobQueueFull
+from wipe_journal import JOURNAL_AUTO_RESUME, JOURNAL_ENABLED, WipeJournal
+from wipe_patterns import PatternMatcher
+from wipe_plans import PlanExpired, PlanNotFound, PlanStore
+from wipe_schedules import DOD_SCHEDULES, get_schedule, schedule_from_wipe_method
+from verify_wipe import calculate_file_hash
 
 # --- Firebase ---
 import firebase_admin
 from firebase_admin import credentials, firestore
 
 db = None
-try:
-    if not firebase_admin._apps:
-        firebase_key_json = os.getenv("FIREBASE_KEY_JSON")
+
+def init_firebase():
+    global db
+    try:
+        if not firebase_admin._apps:
+            firebase_key_json = os.getenv("FIREBASE_KEY_JSON")
         
-        if firebase_key_json:
-            # Load from environment variable (JSON string)
-            try:
-                key_dict = json.loads(firebase_key_json)
-                cred = credentials.Certificate(key_dict)
+            if firebase_key_json:
+                # Load from environment variable (JSON string)
+                try:
+                    key_dict = json.loads(firebase_key_json)
+                    cred = credentials.Certificate(key_dict)
+                    firebase_admin.initialize_app(cred)
+                    db = firestore.client()
+                    print("[OK] Firebase initialized successfully from FIREBASE_KEY_JSON env var")
+                except Exception as e:
+                    print(f"[WARNING] Failed to parse FIREBASE_KEY_JSON: {e}")
+                    db = None
+            elif os.path.exists("firebase_key.json"):
+                # Fallback: load from local file (for development)
+                cred = credentials.Certificate("firebase_key.json")
                 firebase_admin.initialize_app(cred)
                 db = firestore.client()
-                print("[OK] Firebase initialized successfully from FIREBASE_KEY_JSON env var")
-            except Exception as e:
-                print(f"[WARNING] Failed to parse FIREBASE_KEY_JSON: {e}")
-                db = None
-        elif os.path.exists("firebase_key.json"):
-            # Fallback: load from local file (for development)
-            cred = credentials.Certificate("firebase_key.json")
-            firebase_admin.initialize_app(cred)
-            db = firestore.client()
-            print("[OK] Firebase initialized successfully from firebase_key.json")
-        else:
-            print("[WARNING] FIREBASE_KEY_JSON env var not set and firebase_key.json not found.")
-            print("  Firebase features will be disabled. Set FIREBASE_KEY_JSON env var to enable.")
-except Exception as e:
-    print(f"[WARNING] Firebase initialization failed: {e}")
-    print("  Certificates will not be saved to Firebase, but local operations will work.")
-    db = None
+                print("[OK] Firebase initialized successfully from firebase_key.json")
+            else:
+                print("[WARNING] FIREBASE_KEY_JSON env var not set and firebase_key.json not found.")
+                print("  Firebase features will be disabled. Set FIREBASE_KEY_JSON env var to enable.")
+    except Exception as e:
+        print(f"[WARNING] Firebase initialization failed: {e}")
+        print("  Certificates will not be saved to Firebase, but local operations will work.")
+        db = None
 
 app = FastAPI(
     title="Secure Wipe API",
@@ -67,6 +83,11 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Anything that opens databases, starts threads or connects out is started
+# here rather than at import: the PII scan's spawned worker processes
+# re-import the script that launched the server (python server.py)
+app.add_event_handler("startup", init_firebase)
+
 # Allow frontend
 app.add_middleware(
     CORSMiddleware,
@@ -89,7 +110,17 @@ def root():
 # ---------- Models ----------
 class WipeRequest(BaseModel):
     mountpoint: str
-    passes: int = 1   # default single-pass overwrite
+    passes: Optional[int] = None          # random passes; unset uses the settings wipeMethod
+    schedule: Optional[str] = None        # named pass schedule ("dod-5220.22-m", "gutmann", "nist-clear", ...)
+    chunk_size_mb: Optional[int] = None   # overwrite buffer size, defaults to WIPE_CHUNK_MB
+    concurrency: Optional[int] = None     # files wiped at once per device, auto-tuned when unset
+    random_source: Optional[str] = None   # "aes-ctr" or "urandom", defaults to WIPE_RANDOM_SOURCE
+    io_mode: Optional[str] = None         # "buffered" or "direct" (O_DIRECT), defaults from settings wipeMethod
+    durability: Optional[str] = None      # "chunk", "pass", "file" or "device", defaults to WIPE_DURABILITY
+    extent_map: Optional[str] = None      # "seek", "fiemap" or "none" (skip holes or not), defaults to WIPE_EXTENT_MAP
+    mode: str = "files"                   # "files" walks the filesystem, "device" overwrites the raw block device
+    prehash: str = "full"                 # pre-wipe SHA-256 of "full" (every file), "sample" or "none"
+    prehash_sample: float = 0.1           # fraction of files hashed when prehash="sample"
 
 class SettingsUpdate(BaseModel):
     wipeMethod: str = "3-pass"
@@ -105,9 +136,20 @@ class VerifyWipeRequest(BaseModel):
 
 class SelectiveWipeRequest(BaseModel):
     mountpoint: str
-    patterns: List[str]
-    passes: int = 1
+    patterns: List[str] = []
+    plan_token: Optional[str] = None       # from a dry run; wipes its files without re-walking the device
+    on_drift: str = "skip"                 # planned files that changed since the dry run: "skip" or "abort"
+    passes: Optional[int] = None
+    schedule: Optional[str] = None
     dry_run: bool = False
+    chunk_size_mb: Optional[int] = None
+    concurrency: Optional[int] = None
+    random_source: Optional[str] = None
+    io_mode: Optional[str] = None
+    durability: Optional[str] = None
+    extent_map: Optional[str] = None
+    wipe_free_space: bool = False          # overwrite unallocated space after the matched files
+    free_space_reserve_mb: Optional[int] = None   # left free for other writers, defaults to WIPE_FREE_SPACE_RESERVE_MB
 
 
 # ---------- Settings (new) ----------
@@ -170,130 +212,102 @@ def get_health():
 
 
 # ---------- Risk Analysis ----------
-HIGH_RISK_EXT = {".docx", ".doc", ".pdf", ".xls", ".xlsx", ".ppt", ".pptx", ".db", ".key", ".pem"}
-MEDIUM_RISK_EXT = {".jpg", ".jpeg", ".png", ".gif", ".mp4", ".avi", ".zip", ".rar"}
-LOW_RISK_EXT = {".txt", ".log", ".tmp"}
-
-def analyze_device(mountpoint, max_files=200):
-    risky_files = []
-    score = 0
-    count = 0
-    for root, dirs, files in os.walk(mountpoint):
-        for name in files:
-            if count >= max_files:
-                break
-            ext = os.path.splitext(name)[1].lower()
-            if ext in HIGH_RISK_EXT:
-                score += 5
-                level = "high"
-            elif ext in MEDIUM_RISK_EXT:
-                score += 3
-                level = "medium"
-            elif ext in LOW_RISK_EXT:
-                score += 1
-                level = "low"
-            else:
-                level = "unknown"
-            risky_files.append({"file": os.path.join(root, name), "risk": level})
-            count += 1
-    risk_score = min(100, score)
-    return {"risk_score": risk_score, "files": risky_files[:20]}
+# Persistent per-filesystem file index behind /devices?scan=index
+scan_index = None
+
+@app.on_event("startup")
+def open_scan_index():
+    global scan_index
+    scan_index = ScanIndex()
+
+DEVICE_SCAN_MODES = ("index",) + SCAN_MODES
+
+# Modes that walk every file, so the PII scan has the text files to search
+PII_SCAN_MODES = ("quick", "full")
+
+def analyze_device(mountpoint, mode="quick", time_budget=None, content=False, pii=False):
+    """Risk score and per-extension tallies of a device's files (see risk_scanner)"""
+    return scan_device(mountpoint, mode=mode, time_budget=time_budget, content=content, pii=pii)
+
+def _indexed_analysis(mountpoint):
+    """
+    Analysis from the scan index, refreshed incrementally in the background.
+    Until a device's first index build finishes, a sampled estimate stands in.
+    """
+    fs_id = device_registry.filesystem_id(mountpoint)
+    analysis = scan_index.analysis(fs_id)
+    started = scan_index.refresh_async(fs_id, mountpoint)
+    if analysis is None:
+        analysis = {**analyze_device(mountpoint, "sample"), "refreshing": started or None}
+    return analysis
 
 
 # ---------- Health Check ----------
+smart_prober = None
+
+@app.on_event("startup")
+def start_smart_prober():
+    global smart_prober
+    smart_prober = SmartProber()
+
 def get_device_health(device_path: str) -> int:
-    system = platform.system()
-    try:
-        if system in ["Darwin", "Linux"]:
-            result = subprocess.run(
-                ["smartctl", "-H", device_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            if "PASSED" in result.stdout:
-                return 100
-            elif "FAILED" in result.stdout:
-                return 10
-            else:
-                return 70
-        elif system == "Windows":
-            result = subprocess.run(
-                ["wmic", "diskdrive", "get", "status"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            if "OK" in result.stdout:
-                return 100
-            elif "Pred Fail" in result.stdout:
-                return 20
-            else:
-                return 70
-    except Exception as e:
-        print(f"SMART health check failed: {e}")
-    return 80
+    """0-100 SMART health of one device (see smart_health for the structured record)"""
+    return smart_prober.health_many([device_path])[device_path]["health"]
 
 
 # ---------- Device Detection ----------
-def _get_removable_devices():
+# Cached mount table; guards only need identity, /devices adds the analysis
+device_registry = None
+
+@app.on_event("startup")
+def open_device_registry():
+    global device_registry
+    device_registry = DeviceRegistry()
+
+def _is_removable_mount(mountpoint):
+    return device_registry.is_removable(mountpoint)
+
+def _get_removable_devices(scan="index", budget=None, content=False, pii=False):
+    """Removable devices with usage, risk analysis and SMART health"""
+    idents = []
+    for ident in device_registry.removable():
+        try:
+            usage = shutil.disk_usage(ident["mountpoint"])
+        except OSError as e:
+            print(f"Skipping {ident['mountpoint']}: {e}")
+            continue
+        idents.append((ident, usage))
+    # All drives are probed at once, each with a timeout, before the (slower) scans
+    smart = smart_prober.health_many([ident["block_device"] or ident["device"] for ident, _ in idents])
     devices = []
-    system = platform.system()
-    if system == "Windows":
-        for part in psutil.disk_partitions(all=False):
-            if "removable" in part.opts.lower():
-                usage = shutil.disk_usage(part.mountpoint)
-                analysis = analyze_device(part.mountpoint)
-                health = get_device_health(part.device)
-                devices.append({
-                    "device": part.device,
-                    "mountpoint": part.mountpoint,
-                    "total": usage.total,
-                    "free": usage.free,
-                    "analysis": analysis,
-                    "health": health
-                })
-    elif system == "Darwin":  # macOS
-        base = "/Volumes"
-        if os.path.exists(base):
-            for entry in os.listdir(base):
-                mp = os.path.join(base, entry)
-                if entry.startswith("."):
-                    continue
-                if os.path.ismount(mp):
-                    usage = shutil.disk_usage(mp)
-                    analysis = analyze_device(mp)
-                    health = get_device_health("/dev/disk2")
-                    devices.append({
-                        "device": entry,
-                        "mountpoint": mp,
-                        "total": usage.total,
-                        "free": usage.free,
-                        "analysis": analysis,
-                        "health": health
-                    })
-    elif system == "Linux":
-        base = "/media"
-        if os.path.exists(base):
-            for user in os.listdir(base):
-                user_dir = os.path.join(base, user)
-                if os.path.isdir(user_dir):
-                    for entry in os.listdir(user_dir):
-                        mp = os.path.join(user_dir, entry)
-                        if os.path.ismount(mp):
-                            usage = shutil.disk_usage(mp)
-                            analysis = analyze_device(mp)
-                            health = get_device_health("/dev/sdb")
-                            devices.append({
-                                "device": entry,
-                                "mountpoint": mp,
-                                "total": usage.total,
-                                "free": usage.free,
-                                "analysis": analysis,
-                                "health": health
-                            })
+    for ident, usage in idents:
+        mp = ident["mountpoint"]
+        health = smart[ident["block_device"] or ident["device"]]
+        devices.append({
+            "device": ident["device"],
+            "mountpoint": mp,
+            "total": usage.total,
+            "free": usage.free,
+            "analysis": _device_analysis(mp, scan, budget, content, pii),
+            "health": health["health"],
+            "smart": health
+        })
     return devices
 
+def _device_analysis(mountpoint, scan="index", budget=None, content=False, pii=False):
+    if scan == "index":
+        return _indexed_analysis(mountpoint)
+    return analyze_device(mountpoint, scan, budget, content, pii)
+
+def _check_device_scan(scan, content, pii):
+    if scan not in DEVICE_SCAN_MODES:
+        raise HTTPException(status_code=400, detail=f"scan must be one of: {', '.join(DEVICE_SCAN_MODES)}")
+    # The index records risk by extension only
+    if content and scan not in SCAN_MODES:
+        raise HTTPException(status_code=400, detail=f"content needs scan={' or '.join(SCAN_MODES)}")
+    if pii and scan not in PII_SCAN_MODES:
+        raise HTTPException(status_code=400, detail=f"pii needs scan={' or '.join(PII_SCAN_MODES)}")
+
 
 # ---------- Laptop/System Storage ----------
 def analyze_storage(path: str):
@@ -313,8 +327,78 @@ def analyze_storage(path: str):
     }
 
 @app.get("/devices")
-def list_devices():
-    return {"devices": _get_removable_devices()}
+def list_devices(scan: str = Query("index"), budget: Optional[float] = Query(None, ge=0),
+                 content: bool = Query(False), pii: bool = Query(False)):
+    """
+    Removable devices with a risk analysis per device: scan="index" answers from the
+    persistent scan index (refreshed in the background), "quick" counts every file,
+    "full" adds bytes per extension, "sample" estimates within a confidence interval.
+    budget caps each device's scan in seconds (0 scans without a limit);
+    content=true (quick/full/sample) also classifies files by their magic bytes;
+    pii=true (quick/full) searches text files for card numbers, ids and keys and scores hits as high risk.
+    """
+    _check_device_scan(scan, content, pii)
+    return {"devices": _get_removable_devices(scan, budget, content, pii)}
+
+@app.get("/devices/stream")
+async def stream_devices(scan: str = Query("index"), budget: Optional[float] = Query(None, ge=0),
+                         content: bool = Query(False), pii: bool = Query(False)):
+    """
+    /devices as NDJSON: a "device" record per removable device right away, then its
+    "analysis" and "health" records as each finishes (devices are scanned concurrently),
+    and a final "done" record. Takes the same parameters as /devices.
+    """
+    _check_device_scan(scan, content, pii)
+
+    def line(record):
+        return json.dumps(record) + "\n"
+
+    async def analysis(mp):
+        return {"type": "analysis", "mountpoint": mp,
+                "analysis": await asyncio.to_thread(_device_analysis, mp, scan, budget, content, pii)}
+
+    async def health(mp, node, semaphore):
+        smart = await smart_prober.probe(node, semaphore)
+        return {"type": "health", "mountpoint": mp, "health": smart["health"], "smart": smart}
+
+    async def stream():
+        results = asyncio.Queue()
+        semaphore = asyncio.Semaphore(smart_prober.concurrency)
+        tasks = []
+
+        def report(stage, mp, job):
+            async def run():
+                try:
+                    record = await job
+                except Exception as e:
+                    record = {"type": "error", "stage": stage, "mountpoint": mp, "detail": str(e)}
+                await results.put(record)
+            tasks.append(asyncio.create_task(run()))
+
+        try:
+            count = 0
+            for ident in await asyncio.to_thread(device_registry.removable):
+                mp = ident["mountpoint"]
+                try:
+                    usage = await asyncio.to_thread(shutil.disk_usage, mp)
+                except OSError as e:
+                    print(f"Skipping {mp}: {e}")
+                    continue
+                count += 1
+                yield line({"type": "device", "device": ident["device"], "mountpoint": mp,
+                            "total": usage.total, "free": usage.free})
+                report("analysis", mp, analysis(mp))
+                report("health", mp, health(mp, ident["block_device"] or ident["device"], semaphore))
+            for _ in range(len(tasks)):
+                yield line(await results.get())
+            yield line({"type": "done", "devices": count})
+        finally:
+            # The client went away (or we are done): stop whatever is still running
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache"})
 
 @app.get("/system-analysis")
 def system_analysis():
@@ -398,14 +482,177 @@ def download_certificate(cert_id: str, user: dict = Depends(verify_firebase_toke
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ---------- Wipe Engine ----------
+def _resolve_io_mode(req):
+    """Use the request's io_mode, else direct I/O when the settings wipeMethod ends in -direct"""
+    if req.io_mode:
+        return req.io_mode
+    method = str(load_settings().get("wipeMethod", ""))
+    return "direct" if method.endswith("-direct") else "buffered"
+
+def _resolve_schedule(req):
+    """
+    Pin a request to a pass schedule: its own `schedule`, else the settings
+    wipeMethod when the request gave no pass count, else `passes` random passes.
+    The choice is written back to the request so a journaled resume replays it.
+    """
+    try:
+        if req.schedule:
+            schedule = get_schedule(req.schedule, max(1, req.passes or 1))
+        else:
+            schedule = None
+            if req.passes is None:
+                schedule = schedule_from_wipe_method(load_settings().get("wipeMethod"))
+            schedule = schedule or get_schedule("random", max(1, req.passes or 1))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    req.schedule = schedule.name
+    req.passes = schedule.write_passes
+    return schedule
+
+def _schedule_method(schedule):
+    """Certificate method text for a schedule, e.g. "3-pass" or "DoD 5220.22-M, 3-pass" """
+    passes = f"{schedule.write_passes}-pass"
+    return passes if schedule.name == "random" else f"{schedule.label}, {passes}"
+
+def _schedule_data(schedule, engine):
+    """Certificate verification_data fields describing the schedule that ran"""
+    return {
+        "passes": schedule.write_passes,
+        "schedule": schedule.name,
+        "pass_patterns": schedule.describe(),
+        "verified_passes": engine.verified_passes,
+        "unverified_passes": engine.unverified_passes,
+    }
+
+def _make_executor(req):
+    """Build the overwrite executor for a wipe request, rejecting bad tuning options"""
+    try:
+        return WipeExecutor(
+            resolve_chunk_size(req.chunk_size_mb),
+            per_device=req.concurrency,
+            random_source=req.random_source,
+            io_mode=_resolve_io_mode(req),
+            durability=req.durability,
+            extent_map=req.extent_map
+        )
+    except (ValueError, RuntimeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ---------- Wipe Jobs ----------
+job_manager = None
+
+@app.on_event("startup")
+def start_job_manager():
+    global job_manager
+    job_manager = JobManager()
+
+JOB_EVENT_INTERVAL = 1.0
+
+# Dry-run plans of /wipe-selective, reusable by the real run
+plan_store = None
+PLAN_DRIFT_POLICIES = ("skip", "abort")
+
+@app.on_event("startup")
+def open_plan_store():
+    global plan_store
+    plan_store = PlanStore()
+
+# Checkpoint journal so wipes cut short by a restart resume where they stopped
+journal = None
+
+@app.on_event("startup")
+def open_journal():
+    global journal
+    if JOURNAL_ENABLED:
+        journal = WipeJournal()
+
+def _start_journal(kind, params):
+    return journal.start(kind, params) if journal is not None else None
+
+def _with_journal(session, runner, job=None):
+    """Run a wipe, closing its journal entry; a crash leaves it open for resumption"""
+    try:
+        result = runner(job)
+    except Exception:
+        if session is not None:
+            session.finish("failed")
+        raise
+    if session is not None:
+        session.finish()
+    return result
+
+def _resume_note(session):
+    """Certificate fields describing earlier interruptions of a wipe"""
+    if session is None or not session.resumed:
+        return {}
+    return {"resumed": True, "resumed_at": list(session.resumes), "journal_id": session.id}
+
+def _track_executor(job, engine, bytes_total=None, files_total=None):
+    """Report an executor's live byte and file counters as the job's progress"""
+    if job is None:
+        return
+    job.track(lambda: {"bytes_done": engine.bytes_written, "files_done": engine.files_done},
+              bytes_total=bytes_total, files_total=files_total)
+
+def _submit_job(kind, runner, params, session=None):
+    """Queue a wipe runner in the background and answer 202 with the job id"""
+    try:
+        job = job_manager.submit(kind, runner, params)
+    except JobQueueFull as e:
+        # The client is told the wipe was rejected, so a restart must not run it
+        if session is not None:
+            session.finish("failed")
+        raise HTTPException(status_code=503, detail=str(e))
+    return JSONResponse(status_code=202, content={
+        "status": "queued",
+        "job_id": job.id,
+        "job": job.snapshot()
+    })
+
+@app.get("/api/jobs")
+def list_jobs():
+    return {"jobs": job_manager.list()}
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.snapshot()
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """Server-Sent Events stream of job progress, ending with a 'done' event"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        while True:
+            if await request.is_disconnected():
+                break
+            snap = job.snapshot()
+            event = "done" if job.finished else "progress"
+            yield f"event: {event}\ndata: {json.dumps(snap)}\n\n"
+            if job.finished:
+                break
+            await asyncio.sleep(JOB_EVENT_INTERVAL)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
 # ---------- Selective Wipe (pattern-based, removable devices only) ----------
 @app.post("/wipe-selective")
-def wipe_selective(req: SelectiveWipeRequest, user: dict = Depends(verify_firebase_token)):
+def wipe_selective(req: SelectiveWipeRequest, async_: bool = Query(False, alias="async"),
+                   user: dict = Depends(verify_firebase_token)):
     """Wipe files matching provided glob patterns under a removable device mountpoint.
     This endpoint is intentionally restricted to removable devices to avoid accidental host wipes.
+    With ?async=true the wipe runs as a background job and a job id is returned at once.
     """
     mp = req.mountpoint
-    passes = max(1, req.passes)
     patterns = req.patterns or []
     dry_run = bool(req.dry_run)
 
@@ -413,115 +660,378 @@ def wipe_selective(req: SelectiveWipeRequest, user: dict = Depends(verify_fireba
         raise HTTPException(status_code=404, detail="Mountpoint not found")
 
     # Ensure the mountpoint is a removable device discovered by the scanner
-    removable = [d["mountpoint"] for d in _get_removable_devices()]
-    if mp not in removable:
+    if not _is_removable_mount(mp):
         raise HTTPException(status_code=403, detail="Selective wiping is only allowed on removable devices")
 
-    import fnmatch
-    matched_files = []
-    for root, dirs, files in os.walk(mp):
-        for name in files:
-            file_path = os.path.join(root, name)
-            for pat in patterns:
-                try:
-                    if fnmatch.fnmatch(name, pat) or fnmatch.fnmatch(file_path, pat):
-                        matched_files.append(file_path)
-                        break
-                except Exception:
-                    continue
-
-    # Remove duplicates
-    matched_files = list(dict.fromkeys(matched_files))
-
-    if dry_run:
-        return {"status": "dry_run", "matches": matched_files, "count": len(matched_files)}
+    drift = None
+    if req.plan_token:
+        matched_files, drift = _load_plan(req)
+        if dry_run:
+            return {"status": "dry_run", "matches": matched_files, "count": len(matched_files),
+                    "plan_token": req.plan_token, "drift": drift}
+        wipe_list = matched_files
+    elif dry_run:
+        token, expires, matched_files = plan_store.create(mp, patterns, PatternMatcher(patterns, mp).walk())
+        return {"status": "dry_run", "matches": matched_files, "count": len(matched_files),
+                "plan_token": token,
+                "plan_expires": datetime.fromtimestamp(expires).strftime("%Y-%m-%d %H:%M:%S")}
+    else:
+        wipe_list = plan_store.write_list(PatternMatcher(patterns, mp).walk())
 
-    files_wiped = 0
-    for file_path in matched_files:
+    try:
+        schedule = _resolve_schedule(req)
+        engine = _make_executor(req)
+        session = _start_journal("wipe-selective", {"request": req.model_dump(), "wipe_list": wipe_list,
+                                                    "identity": _wipe_identity(mp)})
+    except Exception:
+        plan_store.discard_list(wipe_list)
+        raise
+    if req.plan_token:
+        # A plan is good for one wipe; its files are in the wipe list from here on
+        plan_store.discard(req.plan_token)
+    runner = functools.partial(_with_journal, session,
+                               functools.partial(_run_selective_wipe, req, wipe_list, engine,
+                                                 session=session, drift=drift))
+    if async_:
+        try:
+            return _submit_job("wipe-selective", runner,
+                               {"mountpoint": mp, "schedule": schedule.name, "patterns": req.patterns,
+                                "plan_token": req.plan_token}, session)
+        except HTTPException:
+            plan_store.discard_list(wipe_list)
+            raise
+    return runner()
+
+def _load_plan(req):
+    """
+    Files of a dry-run plan that are unchanged since it was made, plus a drift
+    report. A dry run gets them as a list; a real run gets a wipe list path.
+    """
+    if req.on_drift not in PLAN_DRIFT_POLICIES:
+        raise HTTPException(status_code=400,
+                            detail=f"Invalid on_drift '{req.on_drift}'. Use one of: {', '.join(PLAN_DRIFT_POLICIES)}")
+    try:
+        if req.dry_run:
+            header, matched_files, drift = plan_store.check(req.plan_token)
+        else:
+            header, matched_files, drift = plan_store.snapshot(req.plan_token)
+    except PlanNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PlanExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    try:
+        if header["mountpoint"] != req.mountpoint:
+            raise HTTPException(status_code=400, detail="Plan was made for a different mountpoint")
+        if req.patterns and req.patterns != header["patterns"]:
+            raise HTTPException(status_code=400, detail="Patterns differ from the plan; run a new dry run")
+        # Missing files are already gone; a changed one may no longer be the file the operator reviewed
+        if drift["changed"] and req.on_drift == "abort" and not req.dry_run:
+            raise HTTPException(status_code=409,
+                                detail={"message": "Files changed since the dry run", "drift": drift})
+    except HTTPException:
+        if not req.dry_run:
+            plan_store.discard_list(matched_files)
+        raise
+    req.patterns = header["patterns"]
+    return matched_files, drift
+
+def _count_wipe_list(wipe_list, extent_map):
+    """Entries of a wipe list, how many still exist and their allocated bytes per pass"""
+    matches = existing = size = 0
+    for path in plan_store.read_list(wipe_list):
+        matches += 1
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        existing += 1
+        size += allocated_size(st, extent_map)
+    return matches, existing, size
+
+def _run_selective_wipe(req, wipe_list, engine, job=None, session=None, drift=None):
+    mp = req.mountpoint
+    schedule = get_schedule(req.schedule, req.passes)
+    patterns = req.patterns or []
+    engine.journal = session
+    try:
+        # The list is streamed from disk twice: once for the totals, once into the executor
+        matches, existing, size = _count_wipe_list(wipe_list, engine.extent_map)
+        _track_executor(job, engine, bytes_total=size * schedule.write_passes, files_total=existing)
+        files_wiped = engine.wipe_files(
+            (p for p in plan_store.read_list(wipe_list) if os.path.exists(p)),
+            schedule=schedule,
+            on_error=lambda path, e: print(f"Error wiping {path}: {e}")
+        )
+        if session is not None and session.resumed:
+            # Same reasoning as /wipe-usb: the match list is the original total
+            remaining = _count_wipe_list(wipe_list, "none")[1]
+            files_wiped = max(matches - remaining, files_wiped)
+    finally:
+        # Only a crash keeps the list, for the journal to resume from
+        plan_store.discard_list(wipe_list)
+
+    free_space = None
+    if req.wipe_free_space:
+        reserve = FREE_SPACE_RESERVE if req.free_space_reserve_mb is None else req.free_space_reserve_mb * MIB
         try:
-            if not os.path.exists(file_path):
-                continue
-            length = os.path.getsize(file_path)
-            with open(file_path, "r+b") as f:
-                for _ in range(passes):
-                    f.seek(0)
-                    f.write(secrets.token_bytes(length))
-                    f.flush()
-                    os.fsync(f.fileno())
-            os.remove(file_path)
-            files_wiped += 1
+            free_space = engine.make_engine().fill_free_space(
+                mp,
+                reserve=reserve,
+                progress_callback=lambda p: print(f"[wipe-selective] free space {mp}: {p['percent']}%"),
+                progress_interval=5.0
+            )
+            free_space["reserve"] = reserve
         except Exception as e:
-            print(f"Error wiping {file_path}: {e}")
+            # The matched files are already gone, so their certificate is still issued
+            print(f"[wipe-selective] free-space wipe of {mp} failed: {e}")
+            free_space = {"error": str(e), "reserve": reserve}
 
     cert_id = str(uuid.uuid4())[:8]
     cert = {
         "id": cert_id,
         "device": mp,
-        "method": f"Selective Wipe ({len(patterns)} patterns, {passes}-pass)",
+        "method": f"Selective Wipe ({len(patterns)} patterns, {_schedule_method(schedule)}"
+                  f"{', free-space' if free_space and 'error' not in free_space else ''})",
         "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "status": "VALID",
         "files_wiped": files_wiped,
         "verification_data": {
-            "matches": len(matched_files),
-            "passes": passes,
-            "patterns": patterns
+            "matches": matches,
+            **_schedule_data(schedule, engine),
+            "patterns": patterns,
+            "bytes_written": engine.bytes_written,
+            "chunk_size": engine.chunk_size,
+            "random_source": engine.random_source,
+            "io_mode": engine.io_mode,
+            "direct_fallbacks": engine.direct_fallbacks,
+            "durability": engine.durability,
+            "group_commits": engine.group_commits,
+            "extent_map": engine.extent_map,
+            "logical_bytes": engine.logical_bytes,
+            "allocated_bytes": engine.allocated_bytes,
+            "free_space": free_space,
+            "plan_token": req.plan_token,
+            "plan_drift": drift,
+            **_resume_note(session)
         }
     }
     save_certificate(cert)
     auto_register_certificate(cert)
-    return {"status": "success", "message": f"Selective wipe completed on {mp}", "certificate": cert, "files_wiped": files_wiped}
+    message = f"Selective wipe completed on {mp}"
+    if free_space and "error" in free_space:
+        message += f"; free-space wipe failed: {free_space['error']}"
+    return {"status": "success", "message": message, "certificate": cert, "files_wiped": files_wiped}
+
+
+# ---------- Whole-Device Wipe ----------
+def _block_device_for(mountpoint):
+    """Find the block device mounted at a mountpoint"""
+    return device_registry.block_device(mountpoint)
+
+def _unmount(mountpoint):
+    if platform.system() == "Darwin":
+        cmd = ["diskutil", "unmount", mountpoint]
+    else:
+        cmd = ["umount", mountpoint]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=60)
+        return result.returncode == 0
+    except Exception as e:
+        print(f"Unmount of {mountpoint} failed: {e}")
+        return False
+
+def _prepare_device_wipe(mp):
+    """Check a mountpoint may be wiped whole and return its block device"""
+    if platform.system() == "Windows":
+        raise HTTPException(status_code=400, detail="Whole-device wipes are not supported on Windows")
+    if not _is_removable_mount(mp):
+        raise HTTPException(status_code=403, detail="Whole-device wiping is only allowed on removable devices")
+    device = _block_device_for(mp)
+    if not device or not device.startswith("/dev/"):
+        raise HTTPException(status_code=404, detail="Block device for mountpoint not found")
+    return device
+
+def _release_device(device):
+    """Unmount every mountpoint of a block device before it is overwritten"""
+    for mountpoint, entry in device_registry.mounts().items():
+        if entry.source == device and not _unmount(mountpoint) and os.path.ismount(mountpoint):
+            raise HTTPException(status_code=409, detail=f"Could not unmount {mountpoint}; close open files and retry")
+
+def _run_device_wipe(mp, device, schedule, engine, job=None, session=None):
+    """Stream every pass across a raw block device"""
+    # Unmounting here rather than in the request means a queued or rejected
+    # job never leaves the device unmounted, and a resumed one finds it released
+    _release_device(device)
+
+    def report(progress):
+        print(f"[wipe-usb] {device}: {progress['percent']}% "
+              f"({progress['throughput'] / MIB:.1f} MiB/s)")
+
+    start_pass, start_offset, checkpoint = 0, 0, None
+    if session is not None:
+        point = session.resume_point(device)
+        if point:
+            start_pass, start_offset = min(point[0], len(schedule.passes)), point[1]
+        checkpoint = lambda p, offset: session.checkpoint(device, p, offset)
+
+    _track_executor(job, engine, bytes_total=device_size(device) * schedule.write_passes, files_total=0)
+    try:
+        result = engine.make_engine().overwrite_device(device, progress_callback=report,
+                                                       progress_interval=5.0, start_pass=start_pass,
+                                                       start_offset=start_offset, checkpoint=checkpoint,
+                                                       schedule=schedule)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    cert_id = str(uuid.uuid4())[:8]
+    cert = {
+        "id": cert_id,
+        "device": mp,
+        "method": f"Secure Wipe ({_schedule_method(schedule)} raw device overwrite)",
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "status": "VALID",
+        "files_wiped": 0,
+        "verification_data": {
+            "mode": "device",
+            "device_path": device,
+            "device_size": result["device_size"],
+            "bytes_written": result["bytes_written"],
+            **_schedule_data(schedule, engine),
+            "chunk_size": engine.chunk_size,
+            "random_source": engine.random_source,
+            "io_mode": engine.io_mode,
+            "durability": engine.durability,
+            **_resume_note(session)
+        }
+    }
+    save_certificate(cert)
+    auto_register_certificate(cert)
+    return {
+        "status": "success",
+        "message": f"Block device {device} wiped",
+        "certificate": cert,
+        "files_wiped": 0
+    }
 
 
 # ---------- Wipe USB ----------
+PREHASH_MODES = ("full", "sample", "none")
+PREHASH_SAMPLE_RATE = 0.1
+PREHASH_BLOCK_SIZE = MIB
+# Background jobs learn the growing tree size from the walk this many files at a time
+JOB_TOTALS_INTERVAL = 256
+
 @app.post("/wipe-usb")
-def wipe_usb(req: WipeRequest, user: dict = Depends(verify_firebase_token)):
+def wipe_usb(req: WipeRequest, async_: bool = Query(False, alias="async"),
+             user: dict = Depends(verify_firebase_token)):
+    """Wipe a mountpoint file by file, or its whole block device with mode="device".
+    With ?async=true the wipe runs as a background job and a job id is returned at once.
+    """
     mp = req.mountpoint
-    passes = max(1, req.passes)
     if not os.path.exists(mp):
         raise HTTPException(status_code=404, detail="Mountpoint not found")
-    
-    # Store file hashes before wipe for verification
-    file_hashes_before = {}
+    schedule = _resolve_schedule(req)
+    if req.prehash not in PREHASH_MODES:
+        raise HTTPException(status_code=400, detail=f"prehash must be one of: {', '.join(PREHASH_MODES)}")
+    if not 0 < req.prehash_sample <= 1:
+        raise HTTPException(status_code=400, detail="prehash_sample must be in (0, 1]")
+    engine = _make_executor(req)
+    if req.mode == "device":
+        device = _prepare_device_wipe(mp)
+        session = _start_journal("wipe-usb", {"request": req.model_dump(), "device": device,
+                                              "identity": _wipe_identity(mp, device)})
+        runner = functools.partial(_run_device_wipe, mp, device, schedule, engine, session=session)
+    elif req.mode == "files":
+        session = _start_journal("wipe-usb", {"request": req.model_dump(), "identity": _wipe_identity(mp)})
+        runner = functools.partial(_run_usb_wipe, mp, schedule, engine, req.prehash, req.prehash_sample,
+                                   session=session)
+    else:
+        raise HTTPException(status_code=400, detail="mode must be 'files' or 'device'")
+    runner = functools.partial(_with_journal, session, runner)
+    if async_:
+        return _submit_job("wipe-usb", runner, {"mountpoint": mp, "schedule": schedule.name, "mode": req.mode},
+                           session)
+    return runner()
+
+def _run_usb_wipe(mp, schedule, engine, prehash="full", prehash_sample=PREHASH_SAMPLE_RATE,
+                  job=None, session=None):
+    """
+    Walk the mountpoint once: a reader stage sizes and pre-hashes each file
+    while the executor overwrites the files it has already handed over.
+    """
+    engine.journal = session
+    resumed = session is not None and session.resumed
+    # Files already part-wiped by an interrupted run are not worth hashing again
+    hash_mode = "none" if resumed else prehash
+    totals = {"bytes": 0, "files": 0, "hashed": 0}
+
+    def prehash_file(file_path):
+        try:
+            size = allocated_size(os.stat(file_path), engine.extent_map)
+        except OSError:
+            return
+        index = totals["files"]
+        totals["bytes"] += size
+        totals["files"] += 1
+        if totals["files"] % JOB_TOTALS_INTERVAL == 0:
+            _track_executor(job, engine, bytes_total=totals["bytes"] * schedule.write_passes,
+                            files_total=totals["files"])
+        # Sampling takes every 1/rate-th file, so the hashed files are spread over the tree
+        if hash_mode == "none" or (hash_mode == "sample" and
+                                   int((index + 1) * prehash_sample) == int(index * prehash_sample)):
+            return
+        try:
+            calculate_file_hash(file_path, block_size=PREHASH_BLOCK_SIZE)
+            totals["hashed"] += 1
+        except Exception:
+            pass
+
+    def walk():
+        yield from iter_files(mp)
+        # The whole tree has been seen: record its size before the wipe finishes
+        _track_executor(job, engine, bytes_total=totals["bytes"] * schedule.write_passes,
+                        files_total=totals["files"])
+        if session is not None and not resumed:
+            session.update_params(files_hashed_before=totals["hashed"], files_total=totals["files"])
+
     try:
-        for root, dirs, files in os.walk(mp):
-            for name in files:
-                file_path = os.path.join(root, name)
-                try:
-                    # Calculate hash before wipe
-                    from verify_wipe import calculate_file_hash
-                    file_hashes_before[file_path] = calculate_file_hash(file_path)
-                except:
-                    pass
-        
-        # Perform wipe
-        files_wiped = 0
-        for root, dirs, files in os.walk(mp):
-            for name in files:
-                file_path = os.path.join(root, name)
-                try:
-                    length = os.path.getsize(file_path)
-                    with open(file_path, "r+b") as f:
-                        for _ in range(passes):
-                            f.seek(0)
-                            f.write(secrets.token_bytes(length))
-                            f.flush()
-                            os.fsync(f.fileno())
-                    os.remove(file_path)
-                    files_wiped += 1
-                except Exception as e:
-                    print(f"Error wiping {file_path}: {e}")
+        _track_executor(job, engine)
+        files_wiped = engine.wipe_files(
+            pipelined(walk(), prehash_file),
+            schedule=schedule,
+            on_error=lambda path, e: print(f"Error wiping {path}: {e}")
+        )
+        files_hashed = session.params.get("files_hashed_before", 0) if resumed else totals["hashed"]
+        if resumed:
+            # Completions still in the journal's commit batch were lost with the
+            # process, so count what the original walk found minus what is left
+            remaining = sum(1 for _ in iter_files(mp))
+            files_wiped = max(session.params.get("files_total", 0) - remaining, files_wiped)
         
         cert_id = str(uuid.uuid4())[:8]
         cert = {
             "id": cert_id,
             "device": mp,
-            "method": f"Secure Wipe ({passes}-pass overwrite)",
+            "method": f"Secure Wipe ({_schedule_method(schedule)} overwrite)",
             "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "status": "VALID",
             "files_wiped": files_wiped,
             "verification_data": {
-                "files_hashed_before": len(file_hashes_before),
-                "passes": passes
+                "files_hashed_before": files_hashed,
+                "prehash": prehash,
+                **({"prehash_sample": prehash_sample} if prehash == "sample" else {}),
+                **_schedule_data(schedule, engine),
+                "bytes_written": engine.bytes_written,
+                "chunk_size": engine.chunk_size,
+                "random_source": engine.random_source,
+                "io_mode": engine.io_mode,
+                "direct_fallbacks": engine.direct_fallbacks,
+                "durability": engine.durability,
+                "group_commits": engine.group_commits,
+                "extent_map": engine.extent_map,
+                "logical_bytes": engine.logical_bytes,
+                "allocated_bytes": engine.allocated_bytes,
+                **_resume_note(session)
             }
         }
         save_certificate(cert)
@@ -536,6 +1046,100 @@ def wipe_usb(req: WipeRequest, user: dict = Depends(verify_firebase_token)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ---------- Wipe Resumption ----------
+def _wipe_identity(mountpoint, device=None):
+    """
+    What a wipe targets, recorded in its journal entry so a resume only ever
+    touches the same media: a raw device's drive serial and size, or a mount's
+    filesystem UUID, drive serial and filesystem size. Device names and
+    mountpoints are not identities; after a re-plug they may be another disk.
+    """
+    if device:
+        return {"serial": device_serial(whole_disk(device)), "size": device_size(device)}
+    fs_id = device_registry.filesystem_id(mountpoint)
+    block = device_registry.block_device(mountpoint)
+    return {"fs_id": fs_id if fs_id.startswith("uuid:") else None,
+            "serial": device_serial(whole_disk(block)) if block and block.startswith("/dev/") else None,
+            "size": shutil.disk_usage(mountpoint).total}
+
+def _resume_refusal(session, mountpoint, device=None):
+    """Why a journaled wipe must not be resumed on what is attached now, or None"""
+    recorded = session.params.get("identity") or {}
+    if not (recorded.get("fs_id") or recorded.get("serial")):
+        return "no filesystem UUID or drive serial was recorded when it started"
+    target = device or mountpoint
+    if not os.path.exists(target):
+        return f"{target} is not attached"
+    if device:
+        # The wipe unmounted it; anything mounted from it since must still be removable media
+        mounts = [m for m, entry in device_registry.mounts().items() if entry.source == device]
+        if any(not _is_removable_mount(m) for m in mounts):
+            return f"{device} is mounted at a non-removable mountpoint"
+    elif not _is_removable_mount(mountpoint):
+        return f"{mountpoint} is not a removable device"
+    try:
+        current = _wipe_identity(mountpoint, device)
+    except OSError as e:
+        return f"cannot identify {target}: {e}"
+    for key, value in recorded.items():
+        if value is not None and current.get(key) != value:
+            return f"{target} is not the media the wipe started on ({key} {value} != {current.get(key)})"
+    return None
+
+def _fail_session(session):
+    """Close a journaled wipe that will not be resumed, dropping its wipe list"""
+    session.finish("failed")
+    if session.params.get("wipe_list"):
+        plan_store.discard_list(session.params["wipe_list"])
+
+def _resume_wipe(session):
+    """Requeue a journaled wipe as a background job from its last durable checkpoint"""
+    params = session.params
+    if session.kind == "wipe-selective":
+        req = SelectiveWipeRequest(**params["request"])
+    else:
+        req = WipeRequest(**params["request"])
+    mp = req.mountpoint
+    schedule = _resolve_schedule(req)
+    device = params.get("device")
+    target = device or mp
+    refusal = _resume_refusal(session, mp, device)
+    if refusal:
+        print(f"[journal] Not resuming {session.kind} {session.id}: {refusal}")
+        _fail_session(session)
+        return None
+    engine = _make_executor(req)
+    session.mark_resumed()
+    if session.kind == "wipe-selective":
+        runner = functools.partial(_run_selective_wipe, req, params["wipe_list"], engine, session=session)
+    elif device:
+        runner = functools.partial(_run_device_wipe, mp, device, schedule, engine, session=session)
+    else:
+        runner = functools.partial(_run_usb_wipe, mp, schedule, engine, req.prehash, req.prehash_sample,
+                                   session=session)
+    job = job_manager.submit(session.kind, functools.partial(_with_journal, session, runner),
+                             {"mountpoint": mp, "schedule": schedule.name, "resumed_wipe": session.id})
+    print(f"[journal] Resuming {session.kind} of {target} as job {job.id}")
+    return job
+
+@app.on_event("startup")
+def resume_unfinished_wipes():
+    if journal is None:
+        return
+    sessions = journal.unfinished()
+    if sessions and not JOURNAL_AUTO_RESUME:
+        print(f"[journal] {len(sessions)} interrupted wipe(s) left as they are; "
+              f"set WIPE_AUTO_RESUME=1 to resume them at startup")
+        return
+    for session in sessions:
+        try:
+            _resume_wipe(session)
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            print(f"[journal] Resuming wipe {session.id} failed: {detail}")
+            _fail_session(session)
+
+
 # ---------- Compliance Endpoint ----------
 @app.get("/compliance")
 def compliance_check():
@@ -552,7 +1156,9 @@ def compliance_check():
     certs = load_certificates()
     dod_score = 0
     for c in certs:
-        if "3-pass" in c["method"] or "multi-pass" in c["method"]:
+        # Score the schedule that actually ran, and only if its verify pass did
+        data = c.get("verification_data") or {}
+        if data.get("schedule") in DOD_SCHEDULES and not data.get("unverified_passes"):
             dod_score = 100
             break
     if dod_score == 0 and nist_score == 100:
@@ -688,7 +1294,9 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
-    if exc.status_code == 404:
+    # Only an unrouted path is a missing endpoint; a 404 raised by a matched
+    # route ("Plan not found", "Job not found", ...) keeps its own detail
+    if exc.status_code == 404 and request.scope.get("endpoint") is None:
         return JSONResponse(
             status_code=404,
             content={
@@ -700,11 +1308,16 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
                     "GET /api/settings",
                     "POST /api/settings",
                     "GET /devices",
+                    "GET /devices/stream",
                     "GET /system-analysis",
                     "GET /api/certificates",
                     "GET /api/certificates/{cert_id}",
                     "GET /api/certificates/download/{cert_id}",
                     "POST /wipe-usb",
+                    "POST /wipe-selective",
+                    "GET /api/jobs",
+                    "GET /api/jobs/{job_id}",
+                    "GET /api/jobs/{job_id}/events",
                     "GET /compliance",
                     "GET /tamper/verify/{cert_id}",
                     "GET /system-status",
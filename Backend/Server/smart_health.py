@@ -0,0 +1,209 @@
+"""
+SMART Health Prober
+Runs `smartctl -j` for many devices concurrently with a timeout, so a hung
+USB bridge cannot stall /devices, and caches the parsed result per drive
+serial number for a TTL
+"""
+import os
+import re
+import json
+import time
+import shutil
+import signal
+import asyncio
+import platform
+import threading
+from datetime import datetime
+
+SMARTCTL = os.getenv("SMARTCTL_PATH", "smartctl")
+SMART_TIMEOUT = float(os.getenv("SMART_TIMEOUT_SECONDS", "10"))
+SMART_CACHE_TTL = float(os.getenv("SMART_CACHE_TTL_SECONDS", "300"))
+SMART_CONCURRENCY = int(os.getenv("SMART_CONCURRENCY", "4"))
+
+# Scores kept from the old flat check for when no SMART data can be read
+UNAVAILABLE_HEALTH = 80
+UNKNOWN_HEALTH = 70
+FAILED_HEALTH = 10
+
+# ATA attribute ids
+_REALLOCATED = 5
+_PENDING = 197
+_UNCORRECTABLE = 198
+# Normalised value counts down from 100 as the flash wears
+_WEAR_ATTRIBUTES = (177, 202, 231, 233)
+
+
+def whole_disk(node):
+    """Whole-disk device node for a partition (/dev/sdb1 -> /dev/sdb, /dev/disk2s1 -> /dev/disk2)"""
+    if not node or not node.startswith("/dev/"):
+        return node
+    system = platform.system()
+    if system == "Darwin":
+        return re.sub(r"^(/dev/r?disk\d+)s\d+$", r"\1", node)
+    if system == "Linux":
+        name = os.path.basename(os.path.realpath(node))
+        sys_path = os.path.realpath(f"/sys/class/block/{name}")
+        if os.path.exists(os.path.join(sys_path, "partition")):
+            return f"/dev/{os.path.basename(os.path.dirname(sys_path))}"
+    return node
+
+
+def device_serial(node):
+    """Drive serial from the udev database, or None where it is not available"""
+    try:
+        rdev = os.stat(node).st_rdev
+        with open(f"/run/udev/data/b{os.major(rdev)}:{os.minor(rdev)}") as f:
+            props = dict(line[2:].rstrip("\n").split("=", 1) for line in f if line.startswith("E:") and "=" in line)
+    except (OSError, ValueError):
+        return None
+    return props.get("ID_SERIAL_SHORT") or props.get("ID_SERIAL")
+
+
+def _attributes(data):
+    """Pick the health-relevant fields out of smartctl's JSON output"""
+    attrs = {"model": data.get("model_name"), "serial": data.get("serial_number"),
+             "temperature": (data.get("temperature") or {}).get("current"),
+             "power_on_hours": (data.get("power_on_time") or {}).get("hours"),
+             "reallocated_sectors": None, "pending_sectors": None, "uncorrectable_sectors": None,
+             "wear_level": None}
+    table = {row.get("id"): row for row in (data.get("ata_smart_attributes") or {}).get("table", [])}
+    raw = lambda i: (table[i].get("raw") or {}).get("value") if i in table else None
+    attrs["reallocated_sectors"] = raw(_REALLOCATED)
+    attrs["pending_sectors"] = raw(_PENDING)
+    attrs["uncorrectable_sectors"] = raw(_UNCORRECTABLE)
+    for attr_id in _WEAR_ATTRIBUTES:
+        if attr_id in table and table[attr_id].get("value") is not None:
+            attrs["wear_level"] = max(0, min(100, 100 - table[attr_id]["value"]))
+            break
+    nvme = data.get("nvme_smart_health_information_log")
+    if nvme:
+        attrs["wear_level"] = nvme.get("percentage_used")
+        attrs["uncorrectable_sectors"] = nvme.get("media_errors")
+        if attrs["temperature"] is None:
+            attrs["temperature"] = nvme.get("temperature")
+    return attrs
+
+
+def health_score(passed, attrs):
+    """0-100 health from the overall verdict and the wear/defect attributes"""
+    if passed is False:
+        return FAILED_HEALTH
+    known = [attrs[k] for k in ("reallocated_sectors", "pending_sectors", "wear_level", "temperature")
+             if attrs.get(k) is not None]
+    if passed is None and not known:
+        return UNKNOWN_HEALTH
+    score = 100
+    score -= min(40, 2 * (attrs.get("reallocated_sectors") or 0))
+    score -= min(30, 5 * ((attrs.get("pending_sectors") or 0) + (attrs.get("uncorrectable_sectors") or 0)))
+    score -= (attrs.get("wear_level") or 0) // 2
+    if (attrs.get("temperature") or 0) >= 60:
+        score -= 10
+    return max(FAILED_HEALTH, min(100, int(score)))
+
+
+class SmartProber:
+    """Concurrent smartctl probes with a per-serial TTL cache"""
+
+    def __init__(self, ttl=SMART_CACHE_TTL, timeout=SMART_TIMEOUT, concurrency=SMART_CONCURRENCY):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _cache_key(self, node):
+        serial = device_serial(node)
+        return f"serial:{serial}" if serial else f"node:{node}"
+
+    async def _run(self, *args):
+        posix = os.name == "posix"
+        proc = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE,
+                                                    stderr=asyncio.subprocess.DEVNULL,
+                                                    start_new_session=posix)
+        try:
+            out, _ = await asyncio.wait_for(proc.communicate(), self.timeout)
+        except asyncio.CancelledError:
+            # The caller went away (e.g. a /devices/stream client disconnected);
+            # the probe must not outlive it
+            self._kill(proc, posix)
+            raise
+        except asyncio.TimeoutError:
+            self._kill(proc, posix)
+            try:
+                await asyncio.wait_for(proc.wait(), 1)
+            except asyncio.TimeoutError:
+                print(f"{args[0]} (pid {proc.pid}) did not exit after being killed")
+            raise
+        return proc.returncode, out.decode(errors="replace")
+
+    @staticmethod
+    def _kill(proc, posix):
+        """
+        Kill a probe's whole process group (wrappers included). Callers never
+        wait long after this: a probe stuck in the kernel on a hung bridge
+        cannot die until the bridge lets go.
+        """
+        if proc.returncode is not None:
+            return
+        try:
+            os.killpg(proc.pid, signal.SIGKILL) if posix else proc.kill()
+        except ProcessLookupError:
+            pass
+
+    async def _probe_windows(self, node):
+        _, out = await self._run("wmic", "diskdrive", "get", "status")
+        passed = True if "OK" in out else (False if "Pred Fail" in out else None)
+        return {"status": {True: "passed", False: "failed"}.get(passed, "unknown"),
+                "health": {True: 100, False: 20}.get(passed, UNKNOWN_HEALTH)}
+
+    async def _probe(self, node):
+        if platform.system() == "Windows" and not shutil.which(SMARTCTL):
+            return await self._probe_windows(node)
+        # smartctl's exit status is a bitmask of drive problems; the JSON is there either way
+        _, out = await self._run(SMARTCTL, "-j", "-H", "-i", "-A", node)
+        data = json.loads(out) if out.strip() else {}
+        passed = (data.get("smart_status") or {}).get("passed")
+        attrs = _attributes(data)
+        status = {True: "passed", False: "failed"}.get(passed, "unknown")
+        return {"status": status, "health": health_score(passed, attrs), **attrs}
+
+    async def probe(self, node, semaphore=None):
+        """Health record for one device node (partitions are probed as their disk)"""
+        disk = whole_disk(node)
+        if not disk or (platform.system() != "Windows" and not disk.startswith("/dev/")):
+            # No block device behind the mount (tmpfs, network shares, ...)
+            return {"status": "unavailable", "health": UNAVAILABLE_HEALTH, "device": node}
+        key = self._cache_key(disk)
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return {**cached[1], "cached": True}
+        try:
+            if semaphore is not None:
+                async with semaphore:
+                    result = await self._probe(disk)
+            else:
+                result = await self._probe(disk)
+        except asyncio.TimeoutError:
+            # Not cached, so a bridge that recovers is probed again next time
+            return {"status": "timeout", "health": UNAVAILABLE_HEALTH, "device": disk}
+        except (OSError, ValueError) as e:
+            # Cached like a result: a missing smartctl will not appear within the TTL
+            print(f"SMART health check of {disk} failed: {e}")
+            result = {"status": "unavailable", "health": UNAVAILABLE_HEALTH}
+        result.update(device=disk, checked=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.ttl, result)
+        return {**result, "cached": False}
+
+    async def probe_many(self, nodes):
+        """Health records for several device nodes, probed concurrently; same-disk nodes share a probe"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        disks = {node: whole_disk(node) for node in nodes}
+        unique = list(dict.fromkeys(disks.values()))
+        results = dict(zip(unique, await asyncio.gather(*(self.probe(d, semaphore) for d in unique))))
+        return {node: results[disk] for node, disk in disks.items()}
+
+    def health_many(self, nodes):
+        """probe_many for synchronous callers (not from inside a running event loop)"""
+        return asyncio.run(self.probe_many(nodes))
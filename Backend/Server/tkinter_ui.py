@@ -199,7 +199,10 @@ class SecureWipeApp:
         ttk.Label(form_frame, text="Wipe Method:").grid(row=0, column=0, sticky="w", pady=5)
         self.wipe_method_var = tk.StringVar(value="3-pass")
         method_combo = ttk.Combobox(form_frame, textvariable=self.wipe_method_var, 
-                                   values=["1-pass", "3-pass", "7-pass"], state="readonly", width=20)
+                                   values=["1-pass", "3-pass", "7-pass",
+                                           "1-pass-direct", "3-pass-direct", "7-pass-direct",
+                                           "nist-clear", "dod-5220.22-m", "dod-5220.22-m-ece", "gutmann"],
+                                   state="readonly", width=20)
         method_combo.grid(row=0, column=1, sticky="w", pady=5, padx=10)
         
         # Generate Certificates
@@ -286,7 +289,7 @@ class SecureWipeApp:
             else:
                 return None
             
-            if response.status_code == 200:
+            if 200 <= response.status_code < 300:
                 return response.json()
             else:
                 self.log(f"API Error: {response.status_code} - {response.text}")
@@ -405,7 +408,9 @@ class SecureWipeApp:
             self.log(f"Starting wipe operation on {mountpoint}...")
             passes = self.passes_var.get()
             data = {"mountpoint": mountpoint, "passes": passes}
-            result = self.api_request("POST", "/wipe-usb", data)
+            # Run as a background job so the 5 second request timeout never applies to the wipe itself
+            queued = self.api_request("POST", "/wipe-usb?async=true", data)
+            result = self.wait_for_job(queued["job_id"]) if queued else None
             
             if result:
                 self.root.after(0, lambda: messagebox.showinfo("Success", 
@@ -417,6 +422,27 @@ class SecureWipeApp:
         
         threading.Thread(target=wipe, daemon=True).start()
     
+    def wait_for_job(self, job_id, poll_interval=2):
+        """Poll a background wipe job until it finishes; returns its result or None"""
+        last_percent = None
+        while True:
+            job = self.api_request("GET", f"/api/jobs/{job_id}")
+            if job is None:
+                return None
+            if job["status"] == "completed":
+                return job.get("result")
+            if job["status"] == "failed":
+                self.log(f"Wipe job {job_id} failed: {job.get('error')}")
+                return None
+            if job.get("bytes_total"):
+                percent = int(100 * job["bytes_done"] / job["bytes_total"])
+                if percent != last_percent:
+                    eta = job.get("eta_seconds")
+                    eta_text = f", ETA {int(eta)}s" if eta is not None else ""
+                    self.log(f"Wipe progress: {percent}% ({job['files_done']} files{eta_text})")
+                    last_percent = percent
+            time.sleep(poll_interval)
+    
     def refresh_certificates(self):
         """Refresh certificate list"""
         def update():
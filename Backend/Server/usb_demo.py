@@ -14,6 +14,9 @@ from flask import Flask, request, jsonify, send_file
 import psutil
 from flask_cors import CORS
 
+from wipe_engine import OverwriteEngine
+from wipe_schedules import get_schedule
+
 try:
     import pytsk3  # type: ignore
 except Exception as e:  # pragma: no cover
@@ -228,42 +231,25 @@ def usb_wipe():
     if not mountpoint or not os.path.isdir(mountpoint):
         return jsonify({"error": "valid mountpoint required"}), 400
 
-    files_wiped = 0
-    passes = 1
-    if method == "dod":
-        passes = 3
-    elif method == "random":
-        passes = 1
-    elif method == "zeros":
-        passes = 1
+    # dod runs the full DoD 5220.22-M schedule: 0x00, 0xFF, random, then a verify pass
+    schedules = {"zeros": "zeros", "random": "random", "dod": "dod-5220.22-m"}
+    if method not in schedules:
+        return jsonify({"error": f"method must be one of: {', '.join(schedules)}"}), 400
+    schedule = get_schedule(schedules[method])
 
+    files_wiped = 0
+    engine = OverwriteEngine(1024 * 1024)
     for root, _, files in os.walk(mountpoint):
         for name in files:
             fpath = os.path.join(root, name)
             try:
-                length = os.path.getsize(fpath)
-                with open(fpath, "r+b", buffering=0) as f:
-                    for p in range(passes):
-                        f.seek(0)
-                        if method == "zeros":
-                            chunk = b"\x00" * 1024 * 1024
-                            written = 0
-                            while written < length:
-                                f.write(chunk[: min(1024 * 1024, length - written)])
-                                written += min(1024 * 1024, length - written)
-                        elif method in ("random", "dod"):
-                            written = 0
-                            while written < length:
-                                chunk = os.urandom(min(1024 * 1024, length - written))
-                                f.write(chunk)
-                                written += len(chunk)
-                        f.flush()
-                        os.fsync(f.fileno())
-                os.remove(fpath)
+                engine.overwrite_file(fpath, schedule=schedule)
                 files_wiped += 1
             except Exception:
                 pass
-    return jsonify({"status": "ok", "method": method, "passes": passes, "files_wiped": files_wiped})
+    return jsonify({"status": "ok", "method": method, "schedule": schedule.name,
+                    "passes": schedule.write_passes, "files_wiped": files_wiped,
+                    "bytes_written": engine.bytes_written, "verified_passes": engine.verified_passes})
 
 
 @app.get("/")
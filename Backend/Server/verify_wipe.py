@@ -4,46 +4,298 @@ Verifies that data has been permanently deleted and cannot be recovered
 """
 import os
 import sys
+import math
 import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def calculate_file_hash(filepath, algorithm='sha256'):
-    """Calculate hash of a file"""
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # numpy is in requirements.txt; without it Counter is far slower on large files
+
+# Bytes read per call when streaming a file
+VERIFY_CHUNK_SIZE = 8 * 1024 * 1024
+# Entropy is also reported per region of this many bytes
+ENTROPY_REGION_SIZE = 1024 * 1024
+# Random data scores close to 8 bits per byte; below this it may be recoverable
+WIPED_ENTROPY = 7.5
+# A trailing partial region shorter than this is too short to judge by its
+# entropy (random data scores well under 8 bits); it is only checked for a fill
+MIN_TAIL_ENTROPY_SIZE = 4096
+# Bytes from the start of the file kept for the text check and the hex sample
+HEAD_SIZE = 10240
+# Low-entropy regions listed in an analysis
+MAX_LOW_REGIONS = 20
+# A file that repeats a pattern of at most this many bytes is a pattern fill
+MAX_PATTERN_PERIOD = 64
+# Leading bytes of a chunk searched for a pattern before the whole chunk is checked
+_PERIOD_PROBE = 4096
+# Below this many bytes a plain bincount beats the byte-pair one (65536 bins)
+_PAIR_MIN = 64 * 1024
+
+# hashlib releases the GIL, so on a multi-core machine a chunk is hashed on
+# this thread while the main thread builds its histogram. Updates to one
+# digest are sequential, so a single worker is all it can use
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+def _get_hash_pool():
+    """The hashing thread, started on first use; None on a single-core machine"""
+    global _hash_pool
+    if (os.cpu_count() or 1) < 2:
+        return None
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="verify-hash")
+        return _hash_pool
+
+def calculate_file_hash(filepath, algorithm='sha256', block_size=4096):
+    """Calculate hash of a file, reading block_size bytes at a time"""
     hash_obj = hashlib.new(algorithm)
     with open(filepath, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b""):
+        for chunk in iter(lambda: f.read(block_size), b""):
             hash_obj.update(chunk)
     return hash_obj.hexdigest()
 
-def analyze_file_content(filepath, sample_size=1024):
-    """Analyze file content to detect patterns"""
+def byte_histogram(data):
+    """Count of each of the 256 byte values in a bytes-like object, in one pass"""
+    if np is None:
+        counts = [0] * 256
+        for value, n in Counter(bytes(data)).items():
+            counts[value] = n
+        return counts
+    arr = np.frombuffer(data, dtype=np.uint8)
+    if len(arr) < _PAIR_MIN:
+        return np.bincount(arr, minlength=256)
+    # Counting byte pairs as uint16 halves the passes bincount makes; each
+    # pair's count then goes to both of its bytes
+    even = len(arr) & ~1
+    pairs = np.bincount(arr[:even].view(np.uint16), minlength=65536).reshape(256, 256)
+    counts = pairs.sum(axis=0) + pairs.sum(axis=1)
+    if even < len(arr):
+        counts[arr[-1]] += 1
+    return counts
+
+
+def shannon_entropy(counts, total=None):
+    """Shannon entropy in bits per byte of a byte histogram"""
+    counts = counts.tolist() if np is not None and isinstance(counts, np.ndarray) else counts
+    total = sum(counts) if total is None else total
+    if not total:
+        return 0
+    return 0.0 - sum((n / total) * math.log2(n / total) for n in counts if n)
+
+
+class EntropyMeter:
+    """
+    Streaming byte histogram: feed a file through update() in chunks of any
+    size, then read the entropy of the whole stream and of each region.
+    """
+
+    def __init__(self, region_size=ENTROPY_REGION_SIZE):
+        self.region_size = region_size
+        self.total = 0
+        self.regions = []   # entropy of every complete region, in order
+        self.zero_regions = 0   # complete regions of only 0x00 / only 0xFF bytes
+        self.ones_regions = 0
+        self._counts = self._zeros()
+        self._region = self._zeros()
+        self._region_fill = 0
+
+    @staticmethod
+    def _zeros():
+        return np.zeros(256, dtype=np.int64) if np is not None else [0] * 256
+
+    @staticmethod
+    def _add(into, counts):
+        if np is not None:
+            into += counts
+        else:
+            for i, n in enumerate(counts):
+                into[i] += n
+
+    def update(self, data):
+        view = memoryview(data).cast("B")
+        pos = 0
+        while pos < len(view):
+            take = min(len(view) - pos, self.region_size - self._region_fill)
+            self._add(self._region, byte_histogram(view[pos:pos + take]))
+            self._region_fill += take
+            pos += take
+            if self._region_fill == self.region_size:
+                self._close_region()
+        self.total += len(view)
+
+    @staticmethod
+    def _fill_byte(counts, fill):
+        """0x00 or 0xFF when a region holds only that byte, else None"""
+        for value in (0, 255):
+            if fill and counts[value] == fill:
+                return value
+        return None
+
+    def _close_region(self):
+        self.regions.append(shannon_entropy(self._region, self._region_fill))
+        fill = self._fill_byte(self._region, self._region_fill)
+        if fill == 0:
+            self.zero_regions += 1
+        elif fill == 255:
+            self.ones_regions += 1
+        self._add(self._counts, self._region)
+        self._region = self._zeros()
+        self._region_fill = 0
+
+    def histogram(self):
+        """Byte counts of everything fed so far, as a list of 256 ints"""
+        counts = self._counts + self._region if np is not None else \
+            [a + b for a, b in zip(self._counts, self._region)]
+        return counts.tolist() if np is not None else counts
+
+    def entropy(self):
+        return shannon_entropy(self.histogram(), self.total)
+
+    def region_entropy(self):
+        """Entropy per region; the last one covers the tail and may be shorter"""
+        if self._region_fill:
+            return self.regions + [shannon_entropy(self._region, self._region_fill)]
+        return list(self.regions)
+
+    def tail(self):
+        """(length, entropy, fill byte or None) of the trailing partial region, or None"""
+        if not self._region_fill:
+            return None
+        return (self._region_fill, shannon_entropy(self._region, self._region_fill),
+                self._fill_byte(self._region, self._region_fill))
+
+
+def _find_period(data, max_period=MAX_PATTERN_PERIOD):
+    """Smallest p <= max_period for which data repeats every p bytes (at least twice), or None"""
+    for p in range(1, min(max_period, len(data) // 2) + 1):
+        if data[p:] == data[:-p]:
+            return p
+    return None
+
+
+class PatternCheck:
+    """
+    Streaming check for a fill that repeats one short pattern (0x00, 0xFF,
+    0x55AA, ...). Random data fails on the first chunk's leading bytes, after
+    which further chunks cost nothing.
+    """
+
+    def __init__(self, max_period=MAX_PATTERN_PERIOD):
+        self.max_period = max_period
+        self.pattern = None
+        self.possible = True
+        self._offset = 0
+
+    @property
+    def period(self):
+        return len(self.pattern) if self.possible and self.pattern else None
+
+    def update(self, chunk):
+        if not self.possible or not chunk:
+            return
+        if self.pattern is None:
+            # If the whole stream has period q <= max_period, the smallest period
+            # of its first bytes divides q, so the probe finds the right pattern
+            p = _find_period(chunk[:_PERIOD_PROBE], self.max_period)
+            if p is None:
+                self.possible = False
+                return
+            self.pattern = bytes(chunk[:p])
+        p = len(self.pattern)
+        phase = self._offset % p
+        expected = self.pattern[phase:] + self.pattern[:phase]
+        if chunk[:p] != expected[:len(chunk)] or chunk[p:] != chunk[:-p]:
+            self.possible = False
+        self._offset += len(chunk)
+
+
+def analyze_file_content(filepath, sample_size=None, region_size=ENTROPY_REGION_SIZE, algorithm=None):
+    """
+    Analyze file content to detect patterns. The file is read once, in large
+    chunks, and each chunk feeds an EntropyMeter, a PatternCheck and (when
+    algorithm is given) a digest returned as 'hash'. sample_size caps how
+    many bytes are read (None reads everything).
+    """
     try:
-        with open(filepath, 'rb') as f:
-            data = f.read(sample_size)
+        meter = EntropyMeter(region_size)
+        pattern = PatternCheck()
+        digest = hashlib.new(algorithm) if algorithm else None
+        hash_pool = _get_hash_pool() if digest is not None else None
+        hashing = None
+        head = b""
+        with open(filepath, 'rb', buffering=0) as f:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            remaining = sample_size
+            while remaining is None or remaining > 0:
+                chunk = f.read(VERIFY_CHUNK_SIZE if remaining is None else min(VERIFY_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if digest is not None:
+                    if hashing is not None:
+                        hashing.result()
+                    if hash_pool is not None:
+                        hashing = hash_pool.submit(digest.update, chunk)
+                    else:
+                        digest.update(chunk)
+                if len(head) < HEAD_SIZE:
+                    head += chunk[:HEAD_SIZE - len(head)]
+                meter.update(chunk)
+                pattern.update(chunk)
+                if remaining is not None:
+                    remaining -= len(chunk)
+        if hashing is not None:
+            hashing.result()
+        counts = meter.histogram()
         
         # Check for patterns that indicate data recovery
         patterns = {
-            'all_zeros': all(b == 0 for b in data),
-            'all_ones': all(b == 255 for b in data),
-            'repeating_pattern': len(set(data[:100])) < 10 if len(data) >= 100 else False,
-            'text_content': data.decode('utf-8', errors='ignore').isprintable() if len(data) > 0 else False
+            'all_zeros': counts[0] == meter.total,
+            'all_ones': counts[255] == meter.total,
+            'repeating_pattern': pattern.period is not None,
+            'text_content': head.decode('utf-8', errors='ignore').isprintable() if len(head) > 0 else False
         }
         
-        # Calculate entropy (randomness measure) - Shannon entropy
-        if len(data) > 0:
-            import math
-            byte_counts = [data.count(bytes([i])) for i in range(256)]
-            entropy = -sum((count/len(data)) * math.log2(count/len(data)) 
-                          for count in byte_counts if count > 0)
-        else:
-            entropy = 0
+        # Shannon entropy (randomness measure) of the whole file and of each region
+        regions = meter.region_entropy()
+        low = [{'offset': i * region_size, 'entropy': round(e, 4)}
+               for i, e in enumerate(meter.regions) if e < WIPED_ENTROPY]
+        zero_count, ones_count = meter.zero_regions, meter.ones_regions
+        tail = meter.tail()
+        if tail is not None:
+            # A tail of any length may be a 0x00/0xFF fill the wipe never reached;
+            # only one long enough to estimate is also judged by its entropy
+            length, tail_entropy, fill = tail
+            if fill is not None or (length >= MIN_TAIL_ENTROPY_SIZE and tail_entropy < WIPED_ENTROPY):
+                low.append({'offset': len(meter.regions) * region_size, 'entropy': round(tail_entropy, 4)})
+            zero_count += fill == 0
+            ones_count += fill == 255
         
-        return {
+        analysis = {
             'patterns': patterns,
-            'entropy': entropy,
-            'size': len(data),
-            'sample_hex': data[:64].hex() if len(data) >= 64 else data.hex()
+            'pattern_period': pattern.period,
+            'entropy': meter.entropy(),
+            'size': meter.total,
+            'sample_hex': head[:64].hex(),
+            'regions': {
+                'size': region_size,
+                'count': len(regions),
+                'min_entropy': min(regions) if regions else 0,
+                'low_entropy_count': len(low),
+                'low_entropy': low[:MAX_LOW_REGIONS],
+                'zero_count': zero_count,
+                'ones_count': ones_count
+            }
         }
+        if digest is not None:
+            analysis['hash'] = digest.hexdigest()
+        return analysis
     except Exception as e:
         return {'error': str(e)}
 
@@ -68,8 +320,8 @@ def verify_wipe_completeness(filepath, original_hash=None):
     try:
         file_size = os.path.getsize(filepath)
         
-        # Analyze file content
-        analysis = analyze_file_content(filepath, min(file_size, 10240))  # Sample up to 10KB
+        # Analyze the whole file's content and hash it in the same pass
+        analysis = analyze_file_content(filepath, algorithm='sha256')
         
         # Check if file appears to be wiped (high entropy, no patterns)
         is_wiped = False
@@ -83,11 +335,18 @@ def verify_wipe_completeness(filepath, original_hash=None):
             }
         
         # High entropy indicates random data (good for wipe)
-        if analysis['entropy'] > 7.5:
+        if analysis['entropy'] > WIPED_ENTROPY:
             is_wiped = True
         else:
             issues.append(f"Low entropy ({analysis['entropy']:.2f}) - may contain recoverable data")
         
+        # High overall entropy can still hide a stretch the wipe missed
+        low_regions = analysis['regions']['low_entropy_count']
+        if is_wiped and low_regions:
+            issues.append(f"{low_regions} region(s) of {analysis['regions']['size']} bytes with low entropy "
+                          f"- may contain recoverable data")
+            is_wiped = False
+        
         # Check for suspicious patterns
         if analysis['patterns']['all_zeros']:
             issues.append("File contains all zeros - not properly wiped")
@@ -99,8 +358,7 @@ def verify_wipe_completeness(filepath, original_hash=None):
             issues.append("Repeating patterns detected - may be recoverable")
             is_wiped = False
         
-        # Calculate current hash
-        current_hash = calculate_file_hash(filepath)
+        current_hash = analysis.pop('hash')
         
         result = {
             'status': 'verified' if is_wiped and len(issues) == 0 else 'warning',
@@ -0,0 +1,1186 @@
+"""
+Overwrite Engine
+Streams wipe passes through a fixed, reusable buffer so peak memory stays
+flat no matter how large the file being wiped is
+"""
+import os
+import mmap
+import time
+import uuid
+import errno
+import ctypes
+import queue
+import shutil
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from wipe_schedules import FIXED, RANDOM, PATTERN_PASSES, pattern_schedule
+
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+except ImportError:  # pragma: no cover
+    Cipher = None  # falls back to the urandom source
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # Windows: no FIEMAP, extents come from SEEK_DATA or the full size
+
+try:
+    _syncfs = ctypes.CDLL(None, use_errno=True).syncfs
+    _syncfs.argtypes = [ctypes.c_int]
+except (OSError, AttributeError, TypeError):
+    _syncfs = None  # non-Linux: group commits use a global sync
+
+MIB = 1024 * 1024
+DEFAULT_CHUNK_SIZE = int(os.getenv("WIPE_CHUNK_MB", "4")) * MIB
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 64 * MIB
+
+# Per-device concurrency defaults; WIPE_DEVICE_CONCURRENCY overrides auto-tuning
+FLASH_CONCURRENCY = 8
+ROTATIONAL_CONCURRENCY = 2
+UNKNOWN_CONCURRENCY = 4
+DEVICE_CONCURRENCY = int(os.getenv("WIPE_DEVICE_CONCURRENCY", "0"))
+MAX_WORKERS = int(os.getenv("WIPE_MAX_WORKERS", "16"))
+
+# Spare room some ciphers need past the data when writing in place
+BLOCK_SLACK = 15
+DEFAULT_RANDOM_SOURCE = os.getenv("WIPE_RANDOM_SOURCE", "aes-ctr" if Cipher else "urandom")
+
+# Direct I/O needs page-aligned buffers, offsets and lengths
+IO_MODES = ("buffered", "direct")
+DIRECT_ALIGN = mmap.PAGESIZE
+
+# Large files record a durable resume point in the wipe journal this often
+CHECKPOINT_BYTES = int(os.getenv("WIPE_CHECKPOINT_MB", "64")) * MIB
+
+# Free-space wipes: size of each preallocated fill file, and how much space is
+# always left free so other writers on the device are not starved
+FREE_SPACE_FILE_SIZE = 1024 * MIB
+FREE_SPACE_RESERVE = int(os.getenv("WIPE_FREE_SPACE_RESERVE_MB", "256")) * MIB
+
+# When overwrite data is forced to the device:
+#   chunk  - fdatasync after every chunk (strictest, slowest)
+#   pass   - fdatasync after every pass
+#   file   - one fsync per file after all passes
+#   device - no per-file sync; one syncfs per device batch (group commit)
+# Under the looser "file" and "device" policies a multi-pass wipe still
+# datasyncs between write passes, or the page cache would coalesce them and
+# only the last pass would reach the media (the unaligned tail of a direct
+# I/O wipe is buffered too).
+DURABILITY_POLICIES = ("chunk", "pass", "file", "device")
+DEFAULT_DURABILITY = os.getenv("WIPE_DURABILITY", "pass")
+GROUP_COMMIT_FILES = 256
+GROUP_COMMIT_BYTES = 256 * MIB
+
+# Fixed-pattern passes write from shared read-only buffers of at most this size
+PATTERN_BUFFER_SIZE = MIB
+
+# Vectored writes: a fixed-pattern pass issues one pwritev of up to this many
+# bytes, every iovec pointing at a shared pattern buffer (no copies)
+VECTORED_WRITES = os.getenv("WIPE_VECTORED_WRITES", "1") != "0" and hasattr(os, "pwritev")
+VECTOR_BATCH_BYTES = 32 * MIB
+try:
+    IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
+
+# How a file's allocated ranges are found so holes are not overwritten:
+#   seek   - lseek SEEK_DATA/SEEK_HOLE (portable, default)
+#   fiemap - the Linux FIEMAP ioctl, which also skips unwritten (preallocated) extents
+#   none   - overwrite the full logical size
+EXTENT_MAPS = ("seek", "fiemap", "none")
+DEFAULT_EXTENT_MAP = os.getenv("WIPE_EXTENT_MAP", "seek")
+
+# How far a pipelined pre-wipe stage (e.g. hashing) may run ahead of the wipe
+PIPELINE_DEPTH = 64
+
+
+def resolve_chunk_size(chunk_size_mb=None):
+    """Turn an optional MiB value from a request into a clamped byte size"""
+    if not chunk_size_mb:
+        size = DEFAULT_CHUNK_SIZE
+    else:
+        size = int(chunk_size_mb) * MIB
+    return max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, size))
+
+
+def _write_all(f, view):
+    """Write a whole memoryview, looping over short writes from unbuffered files"""
+    written = 0
+    total = len(view)
+    while written < total:
+        n = f.write(view[written:])
+        if not n:
+            raise IOError("write returned no progress")
+        written += n
+    return written
+
+
+def device_size(path):
+    """Size in bytes of a block device or disk image (getsize reports 0 for devices)"""
+    with open(path, "rb") as f:
+        return f.seek(0, os.SEEK_END)
+
+
+def check_extent_map(extent_map):
+    """Validate an extent map name, returning it normalised"""
+    extent_map = (extent_map or DEFAULT_EXTENT_MAP).lower()
+    if extent_map not in EXTENT_MAPS:
+        raise ValueError(f"Unknown extent map '{extent_map}'. Use one of: {', '.join(EXTENT_MAPS)}")
+    return extent_map
+
+
+def _seek_extents(fd, length):
+    """Allocated ranges of an open file via SEEK_DATA/SEEK_HOLE, or None if unsupported"""
+    if not hasattr(os, "SEEK_DATA"):
+        return None
+    extents = []
+    offset = 0
+    while offset < length:
+        try:
+            start = os.lseek(fd, offset, os.SEEK_DATA)
+        except OSError as e:
+            if e.errno == errno.ENXIO:   # no data past offset
+                break
+            if e.errno == errno.EINVAL:  # filesystem without hole support
+                return None
+            raise
+        if start >= length:
+            break
+        end = min(os.lseek(fd, start, os.SEEK_HOLE), length)
+        extents.append((start, end))
+        offset = end
+    return extents
+
+
+FS_IOC_FIEMAP = 0xC020660B
+FIEMAP_FLAG_SYNC = 0x1
+FIEMAP_EXTENT_LAST = 0x1
+FIEMAP_EXTENT_UNWRITTEN = 0x800
+_FIEMAP_HEADER = struct.Struct("=QQIIII")
+_FIEMAP_EXTENT = struct.Struct("=QQQQQIIII")
+_FIEMAP_BATCH = 256
+
+
+def _fiemap_extents(fd, length):
+    """
+    Written extents of an open file from the Linux FIEMAP ioctl, or None if
+    unsupported. Unwritten extents (fallocate reservations) read back as zeros,
+    so they hold none of the file's data and are skipped.
+    """
+    if fcntl is None:
+        return None
+    extents = []
+    start = 0
+    request = bytearray(_FIEMAP_HEADER.size + _FIEMAP_EXTENT.size * _FIEMAP_BATCH)
+    while start < length:
+        _FIEMAP_HEADER.pack_into(request, 0, start, length - start, FIEMAP_FLAG_SYNC, 0, _FIEMAP_BATCH, 0)
+        try:
+            fcntl.ioctl(fd, FS_IOC_FIEMAP, request)
+        except OSError:
+            return None
+        mapped = _FIEMAP_HEADER.unpack_from(request, 0)[3]
+        if mapped == 0:
+            break
+        last = False
+        for i in range(mapped):
+            logical, _, size, _, _, flags, _, _, _ = _FIEMAP_EXTENT.unpack_from(
+                request, _FIEMAP_HEADER.size + i * _FIEMAP_EXTENT.size)
+            start = logical + size
+            last = bool(flags & FIEMAP_EXTENT_LAST)
+            if not flags & FIEMAP_EXTENT_UNWRITTEN:
+                extents.append((logical, min(logical + size, length)))
+        if last:
+            break
+    return _merge_ranges(extents)
+
+
+def _merge_ranges(ranges):
+    """Sort ranges and join the ones that touch or overlap"""
+    merged = []
+    for begin, end in sorted(ranges):
+        if end <= begin:
+            continue
+        if merged and begin <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((begin, end))
+    return merged
+
+
+def file_extents(fd, length, extent_map=None):
+    """
+    Byte ranges of an open file that hold data and so need overwriting.
+
+    Holes are left alone: writing them would allocate real blocks, which can
+    fill the device and spends most of a sparse file's wipe on zeros.
+    """
+    extent_map = check_extent_map(extent_map)
+    extents = None
+    if extent_map == "fiemap":
+        extents = _fiemap_extents(fd, length)
+    if extents is None and extent_map != "none":
+        extents = _seek_extents(fd, length)
+    if extents is None:
+        extents = [(0, length)] if length else []
+    return extents
+
+
+def allocated_size(st, extent_map=None):
+    """Bytes a wipe of a file with this stat result is expected to write per pass"""
+    if check_extent_map(extent_map) == "none" or not hasattr(st, "st_blocks"):
+        return st.st_size
+    return min(st.st_size, st.st_blocks * 512)
+
+
+def _clip_ranges(ranges, start, length):
+    """The parts of ranges within [start, length)"""
+    return [(max(b, start), min(e, length)) for b, e in ranges if e > start and b < length]
+
+
+def _align_ranges(ranges, length):
+    """Widen ranges to DIRECT_ALIGN boundaries (capped at length) for O_DIRECT writes"""
+    return _merge_ranges(
+        (b - b % DIRECT_ALIGN, min(length, e + (-e) % DIRECT_ALIGN)) for b, e in ranges
+    )
+
+
+class WipeVerificationError(IOError):
+    """Raised when a verify pass reads back something other than what was written"""
+
+
+_pattern_buffers = {}
+_pattern_lock = threading.Lock()
+
+
+def pattern_buffers(pattern, size):
+    """
+    Page-aligned, read-only buffers of `pattern` tiled to `size` bytes, one per
+    phase: buffer i starts with pattern[i], so the write at file offset o uses
+    buffer o % len(pattern) and multi-byte patterns stay continuous across chunks.
+
+    Built once per process and shared by every engine and thread. Only the
+    patterns of the named schedules are ever requested, so the cache stays small.
+    """
+    key = (pattern, size)
+    with _pattern_lock:
+        views = _pattern_buffers.get(key)
+        if views is None:
+            views = []
+            for phase in range(len(pattern)):
+                rotated = pattern[phase:] + pattern[:phase]
+                buf = mmap.mmap(-1, size)
+                buf.write((rotated * (size // len(rotated) + 1))[:size])
+                views.append(memoryview(buf).toreadonly())
+            _pattern_buffers[key] = views
+        return views
+
+
+def _same_data(a, b):
+    """Compare two equal-length byte views; 8-byte items compare ~10x faster than bytes"""
+    whole = len(a) - len(a) % 8
+    return a[:whole].cast("Q") == b[:whole].cast("Q") and a[whole:] == b[whole:]
+
+
+def _as_spec(pattern):
+    """Accept a PassSpec or one of the legacy pattern names ("random", "zeros", "ones")"""
+    if isinstance(pattern, str):
+        return PATTERN_PASSES[pattern]
+    return pattern
+
+
+class Progress:
+    """
+    Throttled progress reporting for long streaming wipes.
+
+    advance() is called once per chunk; the callback receives a snapshot dict
+    at most once per `interval` seconds, plus once when the total is reached.
+    """
+
+    def __init__(self, total, callback=None, interval=1.0):
+        self.total = total
+        self.callback = callback
+        self.interval = interval
+        self.bytes_done = 0
+        self.started = time.monotonic()
+        self._last_report = 0.0
+
+    def snapshot(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rate = self.bytes_done / elapsed
+        remaining = max(self.total - self.bytes_done, 0)
+        return {
+            "bytes_done": self.bytes_done,
+            "bytes_total": self.total,
+            "percent": round(100.0 * self.bytes_done / self.total, 1) if self.total else 100.0,
+            "throughput": rate,
+            "eta_seconds": remaining / rate if rate > 0 else None,
+        }
+
+    def advance(self, n):
+        self.bytes_done += n
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if now - self._last_report >= self.interval or self.bytes_done >= self.total:
+            self._last_report = now
+            self.callback(self.snapshot())
+
+
+class UrandomSource:
+    """Pass data straight from the OS CSPRNG (one getrandom call per chunk)"""
+    name = "urandom"
+
+    def start_pass(self):
+        pass
+
+    def replay(self):
+        """urandom output cannot be regenerated, so its passes cannot be verified"""
+        return None
+
+    def fill(self, buffer, n):
+        buffer[:n] = os.urandom(n)
+
+
+class AesCtrSource:
+    """
+    Pass data from an AES-256-CTR keystream.
+
+    A fresh key and nonce are drawn from os.urandom at the start of each pass,
+    then the keystream is encrypted straight into the engine buffer. The output
+    is still CSPRNG data, so certificates can keep calling it a random
+    overwrite, but it is generated far faster than getrandom can supply it.
+    """
+    name = "aes-ctr"
+
+    def __init__(self, chunk_size):
+        if Cipher is None:
+            raise RuntimeError("cryptography not installed. Install with: pip install cryptography")
+        self._zeros = memoryview(bytes(chunk_size))
+        self._key = None
+        self._nonce = None
+        self._encryptor = None
+
+    def start_pass(self):
+        self._key = os.urandom(32)
+        self._nonce = os.urandom(16)
+        self._encryptor = Cipher(algorithms.AES(self._key), modes.CTR(self._nonce)).encryptor()
+
+    def replay(self):
+        """A source that regenerates the current pass's keystream from its start"""
+        clone = AesCtrSource.__new__(AesCtrSource)
+        clone._zeros = self._zeros
+        clone._key, clone._nonce = self._key, self._nonce
+        clone._encryptor = Cipher(algorithms.AES(self._key), modes.CTR(self._nonce)).encryptor()
+        return clone
+
+    def fill(self, buffer, n):
+        if self._encryptor is None:
+            self.start_pass()
+        self._encryptor.update_into(self._zeros[:n], buffer[:n + BLOCK_SLACK])
+
+
+RANDOM_SOURCES = {
+    UrandomSource.name: lambda chunk_size: UrandomSource(),
+    AesCtrSource.name: AesCtrSource,
+}
+
+
+def make_random_source(name=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Build a pass-data source by name, defaulting to WIPE_RANDOM_SOURCE"""
+    name = (name or DEFAULT_RANDOM_SOURCE).lower()
+    if name not in RANDOM_SOURCES:
+        raise ValueError(f"Unknown random source '{name}'. Use one of: {', '.join(RANDOM_SOURCES)}")
+    return RANDOM_SOURCES[name](chunk_size)
+
+
+def check_io_mode(io_mode):
+    """Validate an I/O mode name, returning it normalised"""
+    io_mode = (io_mode or "buffered").lower()
+    if io_mode not in IO_MODES:
+        raise ValueError(f"Unknown I/O mode '{io_mode}'. Use one of: {', '.join(IO_MODES)}")
+    if io_mode == "direct" and not hasattr(os, "O_DIRECT"):
+        raise RuntimeError("Direct I/O (O_DIRECT) is not supported on this platform")
+    return io_mode
+
+
+def check_durability(durability):
+    """Validate a durability policy name, returning it normalised"""
+    durability = (durability or DEFAULT_DURABILITY).lower()
+    if durability not in DURABILITY_POLICIES:
+        raise ValueError(
+            f"Unknown durability policy '{durability}'. Use one of: {', '.join(DURABILITY_POLICIES)}"
+        )
+    if durability == "device" and _syncfs is None and not hasattr(os, "sync"):
+        raise RuntimeError("Device group commits are not supported on this platform")
+    return durability
+
+
+def datasync(fd):
+    """fdatasync where available; the file size never changes during a wipe"""
+    if hasattr(os, "fdatasync"):
+        os.fdatasync(fd)
+    else:
+        os.fsync(fd)
+
+
+def syncfs(fd):
+    """Flush every dirty page of the filesystem holding fd (global sync off Linux)"""
+    if _syncfs is None:
+        os.sync()
+        return
+    if _syncfs(fd) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+
+
+def _pwrite_all(fd, view, offset):
+    """pwrite a whole memoryview at offset, looping over short writes"""
+    written = 0
+    total = len(view)
+    while written < total:
+        n = os.pwrite(fd, view[written:], offset + written)
+        if not n:
+            raise IOError("pwrite returned no progress")
+        written += n
+    return written
+
+
+class OverwriteEngine:
+    """
+    Overwrites files pass by pass through one preallocated buffer.
+
+    A single engine is meant to be reused for every pass and every file of a
+    wipe request; it is not thread-safe, so concurrent wipes need one each.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, random_source=None, io_mode="buffered",
+                 durability=None, extent_map=None, vectored=None):
+        self.chunk_size = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, int(chunk_size)))
+        self.io_mode = check_io_mode(io_mode)
+        self.durability = check_durability(durability)
+        self.extent_map = check_extent_map(extent_map)
+        self.vectored = VECTORED_WRITES if vectored is None else bool(vectored and hasattr(os, "pwritev"))
+        if self.io_mode == "direct":
+            # Anonymous mmap memory is page-aligned, which O_DIRECT requires
+            self.chunk_size -= self.chunk_size % DIRECT_ALIGN
+            self._mmap = mmap.mmap(-1, self.chunk_size + DIRECT_ALIGN)
+            self._raw = memoryview(self._mmap)
+        else:
+            self._raw = memoryview(bytearray(self.chunk_size + BLOCK_SLACK))
+        self._view = self._raw[:self.chunk_size]
+        self.direct_fallbacks = 0
+        self.source = make_random_source(random_source, self.chunk_size)
+        self.bytes_written = 0
+        self.write_calls = 0
+        self.logical_bytes = 0
+        self.allocated_bytes = 0
+        self.verified_passes = 0
+        self.unverified_passes = 0
+        self._pattern_views = None
+        self._read_view = None
+        self._last_write = None
+
+    def _start_write(self, spec, ranges):
+        """Set up the data source for one write pass and remember how to verify it"""
+        replay = None
+        if spec.kind == RANDOM:
+            self.source.start_pass()
+            replay = self.source.replay()
+        else:
+            self._pattern_views = pattern_buffers(spec.pattern, min(self.chunk_size, PATTERN_BUFFER_SIZE))
+        self._last_write = (spec, replay, ranges)
+
+    def _step(self, spec):
+        """Largest single write of a pass"""
+        if spec.kind == FIXED:
+            size = len(self._pattern_views[0])
+            if self.vectored:
+                return max(size, min(VECTOR_BATCH_BYTES, size * IOV_MAX))
+            return size
+        return self.chunk_size
+
+    def _iovecs(self, offset, n):
+        """Pattern buffers covering the n bytes at `offset`, each picked for its own phase"""
+        views = self._pattern_views
+        size = len(views[0])
+        iov = []
+        end = offset + n
+        while offset < end:
+            m = min(size, end - offset)
+            view = views[offset % len(views)]
+            iov.append(view if m == size else view[:m])
+            offset += m
+        return iov
+
+    def _write_at(self, fd, spec, offset, n):
+        """Write n bytes of pass data at offset with pwrite, or one pwritev for fixed patterns"""
+        self.write_calls += 1
+        if self.vectored and spec.kind == FIXED:
+            written = os.pwritev(fd, self._iovecs(offset, n), offset)
+            if not written:
+                raise IOError("pwritev returned no progress")
+            return written
+        return _pwrite_all(fd, self._fill(n, spec, offset), offset)
+
+    def _fill(self, n, spec, offset, source=None):
+        """
+        Pass data for the n bytes at `offset`: keystream generated into the
+        engine buffer, or a slice of the shared buffer for a fixed pattern
+        """
+        if spec.kind == RANDOM:
+            (source or self.source).fill(self._raw, n)
+            return self._view[:n]
+        views = self._pattern_views
+        return views[offset % len(views)][:n]
+
+    def overwrite_pass(self, f, length, pattern="random", progress=None, start=0, checkpoint=None,
+                       extents=None):
+        """
+        Stream one pass over the first `length` bytes of an open file, or only
+        over `extents` ((begin, end) ranges) when given.
+
+        Writing begins at `start` when resuming. If given, checkpoint(offset)
+        is called every CHECKPOINT_BYTES, after the data before offset is synced.
+
+        Returns:
+            int: Number of bytes written
+        """
+        spec = _as_spec(pattern)
+        ranges = _clip_ranges(extents if extents is not None else [(0, length)], start, length)
+        self._start_write(spec, ranges)
+        step = self._step(spec)
+        # Fixed patterns go straight to the descriptor with pwritev, bypassing f's buffer
+        vector = self.vectored and spec.kind == FIXED
+        if vector:
+            f.flush()
+        total = 0
+        since_checkpoint = 0
+        for begin, end in ranges:
+            f.seek(begin)
+            offset = begin
+            while offset < end:
+                n = min(step, end - offset)
+                if vector:
+                    written = self._write_at(f.fileno(), spec, offset, n)
+                else:
+                    self.write_calls += 1
+                    written = _write_all(f, self._fill(n, spec, offset))
+                offset += written
+                total += written
+                self.bytes_written += written
+                if progress:
+                    progress.advance(written)
+                if self.durability == "chunk":
+                    f.flush()
+                    datasync(f.fileno())
+                since_checkpoint += written
+                if checkpoint and since_checkpoint >= CHECKPOINT_BYTES and offset < length:
+                    f.flush()
+                    datasync(f.fileno())
+                    checkpoint(offset)
+                    since_checkpoint = 0
+        f.flush()
+        if self.durability == "pass":
+            datasync(f.fileno())
+        return total
+
+    def overwrite_pass_direct(self, fd, tail_fd, length, pattern="random", progress=None, start=0,
+                              checkpoint=None, extents=None):
+        """
+        Stream one pass with O_DIRECT writes, bypassing the page cache.
+
+        The page-aligned body goes through fd; an unaligned tail cannot be
+        written with O_DIRECT, so it falls back to the buffered tail_fd.
+        Extents are widened to page boundaries. `start`, `checkpoint` and
+        `extents` otherwise behave as in overwrite_pass.
+        """
+        spec = _as_spec(pattern)
+        aligned = length - length % DIRECT_ALIGN
+        start -= start % DIRECT_ALIGN
+        ranges = _align_ranges(
+            _clip_ranges(extents if extents is not None else [(0, length)], start, length), length)
+        self._start_write(spec, ranges)
+        step = self._step(spec)
+        total = 0
+        since_checkpoint = 0
+        for begin, end in ranges:
+            offset = begin
+            while offset < min(end, aligned):
+                n = min(step, min(end, aligned) - offset)
+                written = self._write_at(fd, spec, offset, n)
+                offset += written
+                total += written
+                self.bytes_written += written
+                if progress:
+                    progress.advance(written)
+                if self.durability == "chunk":
+                    datasync(fd)
+                since_checkpoint += written
+                if checkpoint and since_checkpoint >= CHECKPOINT_BYTES and offset < aligned:
+                    datasync(fd)
+                    checkpoint(offset)
+                    since_checkpoint = 0
+            if end > aligned:
+                written = self._write_at(tail_fd, spec, aligned, end - aligned)
+                total += written
+                self.bytes_written += written
+                if progress:
+                    progress.advance(end - aligned)
+        # Both descriptors share an inode, so one sync covers the buffered tail too
+        if self.durability in ("chunk", "pass"):
+            datasync(fd)
+        return total
+
+    def verify_pass(self, path, length, previous=(), extents=None):
+        """
+        Read back the most recent write pass and compare it with what was written.
+
+        The page cache is dropped first so the data comes from the media. A
+        random pass is checked by replaying its keystream; passes whose data
+        cannot be regenerated (urandom output, or a random pass written before
+        a resume) are counted in unverified_passes instead.
+
+        Returns:
+            bool: True if verified, False if the pass could not be checked
+
+        Raises:
+            WipeVerificationError: If the data read back does not match
+        """
+        full = extents if extents is not None else [(0, length)]
+        last = self._last_write
+        if last is None:
+            # Resumed straight into the verify step: only a fixed pattern can be rebuilt
+            spec = next((s for s in reversed(previous) if s.writes), None)
+            last = (spec, None, full) if spec is not None and spec.kind == FIXED else None
+        if last is None or (last[0].kind == RANDOM and last[1] is None):
+            self.unverified_passes += 1
+            return False
+        spec, replay, ranges = last
+        if spec.kind == FIXED:
+            # Every earlier run of this pass wrote the same pattern, so check all of it
+            self._pattern_views = pattern_buffers(spec.pattern, min(self.chunk_size, PATTERN_BUFFER_SIZE))
+            ranges = full
+        if self._read_view is None:
+            self._read_view = memoryview(bytearray(self.chunk_size))
+        view = self._read_view
+        # Compare one pattern buffer (or keystream chunk) at a time
+        step = len(self._pattern_views[0]) if spec.kind == FIXED else self.chunk_size
+        with open(path, "rb", buffering=0) as f:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+            for begin, end in ranges:
+                f.seek(begin)
+                offset = begin
+                while offset < end:
+                    n = min(step, end - offset)
+                    got = 0
+                    while got < n:
+                        r = f.readinto(view[got:n])
+                        if not r:
+                            raise WipeVerificationError(
+                                f"{path}: verify read ended early at offset {offset + got}")
+                        got += r
+                    if not _same_data(view[:n], self._fill(n, spec, offset, replay)):
+                        raise WipeVerificationError(f"{path}: verify pass found unexpected data at offset {offset}")
+                    offset += n
+        self.verified_passes += 1
+        return True
+
+    def _finish_file(self, fd, remove):
+        """Apply the per-file end of the durability policy before the file is closed"""
+        if self.durability == "file":
+            os.fsync(fd)
+        elif self.durability == "device" and remove:
+            # Dirty pages of an unlinked file may be dropped unwritten, so a
+            # standalone wipe cannot defer its sync to a later group commit
+            syncfs(fd)
+
+    def _run_passes(self, path, write_pass, sync, length, extents, steps, start_pass, start_offset,
+                    checkpoint):
+        """
+        Drive schedule steps start_pass.., checkpointing large files between them.
+
+        A write pass followed by another write pass is always synced, whatever
+        the durability policy, so every pass the schedule names reaches the
+        media instead of being merged in the page cache.
+        """
+        written = 0
+        self._last_write = None
+        for p in range(start_pass, len(steps)):
+            spec = steps[p]
+            start = start_offset if p == start_pass else 0
+            if spec.writes:
+                pass_checkpoint = None
+                if checkpoint:
+                    pass_checkpoint = lambda offset, p=p: checkpoint(p, offset)
+                written += write_pass(spec, start, pass_checkpoint)
+                if self.durability in ("file", "device") and any(s.writes for s in steps[p + 1:]):
+                    sync()
+            else:
+                sync()
+                self.verify_pass(path, length, steps[:p], extents)
+            if checkpoint and length >= CHECKPOINT_BYTES:
+                sync()
+                checkpoint(p + 1, 0)
+        return written
+
+    def _map_extents(self, fd, length, sparse):
+        """Ranges of a file to overwrite, counting its logical and allocated size"""
+        extents = file_extents(fd, length, self.extent_map if sparse else "none")
+        self.logical_bytes += length
+        self.allocated_bytes += sum(end - begin for begin, end in extents)
+        return extents
+
+    def _overwrite_direct(self, filepath, length, steps, remove, progress, start_pass, start_offset,
+                          checkpoint, sparse):
+        try:
+            fd = os.open(filepath, os.O_WRONLY | os.O_DIRECT)
+        except OSError:
+            # Filesystems such as tmpfs reject O_DIRECT; wipe those buffered
+            self.direct_fallbacks += 1
+            return None
+        tail_fd = os.open(filepath, os.O_WRONLY)
+        try:
+            extents = self._map_extents(fd, length, sparse)
+            written = self._run_passes(
+                filepath,
+                lambda spec, start, cp: self.overwrite_pass_direct(fd, tail_fd, length, spec, progress,
+                                                                   start, cp, extents),
+                lambda: datasync(fd),
+                length, extents, steps, start_pass, start_offset, checkpoint
+            )
+            self._finish_file(fd, remove)
+        finally:
+            os.close(tail_fd)
+            os.close(fd)
+        return written
+
+    def overwrite_file(self, filepath, passes=1, pattern="random", remove=True, length=None,
+                       progress=None, start_pass=0, start_offset=0, checkpoint=None, schedule=None,
+                       sparse=True):
+        """
+        Overwrite a file with `passes` passes of `pattern`, or with every step
+        of a pass schedule, and optionally delete it.
+
+        With `sparse`, only the ranges holding data are overwritten (found
+        with the engine's extent_map) and holes stay holes; logical_bytes and
+        allocated_bytes record the difference.
+
+        A resumed wipe passes the start_pass/start_offset of its last durable
+        checkpoint (start_pass indexes the schedule's steps). checkpoint(pass,
+        offset) is called as durable resume points are reached in files of at
+        least CHECKPOINT_BYTES.
+
+        Returns:
+            int: Number of bytes written across all passes
+        """
+        steps = (schedule or pattern_schedule(pattern, passes)).passes
+        if length is None:
+            length = os.path.getsize(filepath)
+        written = None
+        if self.io_mode == "direct":
+            written = self._overwrite_direct(filepath, length, steps, remove, progress,
+                                             start_pass, start_offset, checkpoint, sparse)
+        if written is None:
+            with open(filepath, "r+b") as f:
+                extents = self._map_extents(f.fileno(), length, sparse)
+                written = self._run_passes(
+                    filepath,
+                    lambda spec, start, cp: self.overwrite_pass(f, length, spec, progress, start, cp,
+                                                                extents),
+                    lambda: (f.flush(), datasync(f.fileno())),
+                    length, extents, steps, start_pass, start_offset, checkpoint
+                )
+                self._finish_file(f.fileno(), remove)
+        if remove:
+            os.remove(filepath)
+        return written
+
+    def overwrite_device(self, device_path, passes=1, pattern="random", progress_callback=None,
+                         progress_interval=1.0, start_pass=0, start_offset=0, checkpoint=None,
+                         schedule=None):
+        """
+        Overwrite every byte of a block device, or a disk image standing in for one.
+
+        Passes stream sequentially from offset 0, so slack space, deleted data
+        and filesystem metadata are all covered. The device must not be mounted.
+
+        Returns:
+            dict: device_size and bytes_written
+        """
+        schedule = schedule or pattern_schedule(pattern, passes)
+        size = device_size(device_path)
+        progress = Progress(size * schedule.write_passes, progress_callback, progress_interval)
+        progress.bytes_done = size * sum(1 for s in schedule.passes[:start_pass] if s.writes) + start_offset
+        # Holes in a disk image still stand for device blocks, so nothing is skipped
+        written = self.overwrite_file(device_path, remove=False, length=size, progress=progress,
+                                      start_pass=start_pass, start_offset=start_offset,
+                                      checkpoint=checkpoint, schedule=schedule, sparse=False)
+        if self.durability == "device":
+            # Nothing is unlinked, so there is no batch to commit: flush the device here
+            with open(device_path, "rb+") as f:
+                os.fsync(f.fileno())
+        return {"device_size": size, "bytes_written": written}
+
+
+    def _new_fill_file(self, fill_dir, size):
+        """Create and preallocate one fill file; returns its path and usable size"""
+        path = os.path.join(fill_dir, f"fill_{uuid.uuid4().hex[:8]}.bin")
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            if hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(fd, 0, size)
+                except OSError as e:
+                    if e.errno == errno.ENOSPC:
+                        return path, 0
+                    # Filesystem can't preallocate; the overwrite below extends it
+            return path, size
+        finally:
+            os.close(fd)
+
+    def fill_free_space(self, directory, reserve=FREE_SPACE_RESERVE, file_size=FREE_SPACE_FILE_SIZE,
+                        pattern="random", progress_callback=None, progress_interval=1.0):
+        """
+        Overwrite the unallocated space of the filesystem holding `directory`.
+
+        Free space is claimed with preallocated fill files (so other writers
+        see the space go in large, predictable steps and `reserve` bytes always
+        stay free), each fill file is streamed through the engine buffer and
+        fsynced, and all of them are unlinked at the end.
+
+        Returns:
+            dict: bytes_filled and fill_files
+        """
+        fill_dir = os.path.join(directory, f".wipe_fill_{uuid.uuid4().hex[:8]}")
+        os.mkdir(fill_dir, 0o700)
+        progress = Progress(max(shutil.disk_usage(directory).free - reserve, 0),
+                            progress_callback, progress_interval)
+        fill_files = []
+        filled = 0
+        try:
+            while True:
+                # Re-check before every file: other writers may have used space meanwhile
+                budget = shutil.disk_usage(directory).free - reserve
+                if budget < MIN_CHUNK_SIZE:
+                    break
+                path, size = self._new_fill_file(fill_dir, min(file_size, budget))
+                fill_files.append(path)
+                if size == 0:
+                    break
+                try:
+                    # Preallocated space reads as unwritten extents, which an extent
+                    # map would skip: fill files are always written in full
+                    filled += self.overwrite_file(path, 1, pattern, remove=False, length=size,
+                                                  progress=progress, sparse=False)
+                    if self.durability != "file":
+                        # Always sync: these files are unlinked right after
+                        fd = os.open(path, os.O_RDONLY)
+                        try:
+                            os.fsync(fd)
+                        finally:
+                            os.close(fd)
+                except OSError as e:
+                    if e.errno != errno.ENOSPC:
+                        raise
+                    break
+            if progress_callback:
+                progress_callback(progress.snapshot())
+        finally:
+            for path in fill_files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            shutil.rmtree(fill_dir, ignore_errors=True)
+        return {"bytes_filled": filled, "fill_files": len(fill_files)}
+
+
+def is_rotational(st_dev):
+    """
+    Report whether the block device behind st_dev is spinning media.
+
+    Returns True/False on Linux, None when it cannot be determined.
+    """
+    sys_path = f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}"
+    try:
+        real = os.path.realpath(sys_path)
+    except (OSError, ValueError):
+        return None
+    # Partitions have no queue/ directory of their own; their parent disk does
+    for candidate in (real, os.path.dirname(real)):
+        try:
+            with open(os.path.join(candidate, "queue", "rotational")) as f:
+                return f.read().strip() == "1"
+        except OSError:
+            continue
+    return None
+
+
+def device_concurrency(st_dev, override=None):
+    """Pick how many files may be wiped at once on one device"""
+    if override:
+        return max(1, int(override))
+    if DEVICE_CONCURRENCY:
+        return DEVICE_CONCURRENCY
+    rotational = is_rotational(st_dev) if hasattr(os, "major") else None
+    if rotational is None:
+        return UNKNOWN_CONCURRENCY
+    return ROTATIONAL_CONCURRENCY if rotational else FLASH_CONCURRENCY
+
+
+class WipeExecutor:
+    """
+    Wipes many files at once on a thread pool.
+
+    Each worker thread gets its own OverwriteEngine buffer, and a semaphore per
+    st_dev caps how many files are in flight on any single device. File I/O and
+    os.fsync release the GIL, so this mostly overlaps device flush latency.
+
+    With the "device" durability policy, overwritten files are batched per
+    st_dev and only unlinked after one syncfs has committed the whole batch.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=MAX_WORKERS, per_device=None,
+                 random_source=None, io_mode="buffered", durability=None, extent_map=None, vectored=None):
+        self.chunk_size = chunk_size
+        self.vectored = vectored
+        self.random_source = (random_source or DEFAULT_RANDOM_SOURCE).lower()
+        self.io_mode = check_io_mode(io_mode)
+        self.durability = check_durability(durability)
+        self.extent_map = check_extent_map(extent_map)
+        self.group_commits = 0
+        self.files_done = 0
+        self.journal = None
+        self._batches = {}
+        self._on_error = None
+        # Fail fast on a bad source name instead of inside every worker
+        make_random_source(self.random_source, MIN_CHUNK_SIZE)
+        self.max_workers = max(1, int(max_workers))
+        self.per_device = per_device
+        self._local = threading.local()
+        self._engines = []
+        self._lock = threading.Lock()
+        self._device_slots = {}
+
+    @property
+    def bytes_written(self):
+        with self._lock:
+            return sum(e.bytes_written for e in self._engines)
+
+    @property
+    def direct_fallbacks(self):
+        with self._lock:
+            return sum(e.direct_fallbacks for e in self._engines)
+
+    @property
+    def logical_bytes(self):
+        with self._lock:
+            return sum(e.logical_bytes for e in self._engines)
+
+    @property
+    def allocated_bytes(self):
+        with self._lock:
+            return sum(e.allocated_bytes for e in self._engines)
+
+    @property
+    def verified_passes(self):
+        with self._lock:
+            return sum(e.verified_passes for e in self._engines)
+
+    @property
+    def unverified_passes(self):
+        with self._lock:
+            return sum(e.unverified_passes for e in self._engines)
+
+    def make_engine(self):
+        """Create an OverwriteEngine with this executor's options, counted in bytes_written"""
+        engine = OverwriteEngine(self.chunk_size, self.random_source, self.io_mode, self.durability,
+                                 self.extent_map, self.vectored)
+        with self._lock:
+            self._engines.append(engine)
+        return engine
+
+    def _engine(self):
+        engine = getattr(self._local, "engine", None)
+        if engine is None:
+            engine = self.make_engine()
+            self._local.engine = engine
+        return engine
+
+    def _slot(self, st_dev):
+        with self._lock:
+            slot = self._device_slots.get(st_dev)
+            if slot is None:
+                slot = threading.BoundedSemaphore(device_concurrency(st_dev, self.per_device))
+                self._device_slots[st_dev] = slot
+            return slot
+
+    def _wipe_one(self, filepath, schedule):
+        st_dev = os.stat(filepath).st_dev
+        group = self.durability == "device"
+        start_pass, start_offset, checkpoint = 0, 0, None
+        if self.journal is not None:
+            point = self.journal.resume_point(filepath)
+            if point and not point[2]:
+                start_pass, start_offset = point[0], point[1]
+            checkpoint = lambda p, offset: self.journal.checkpoint(filepath, p, offset)
+        with self._slot(st_dev):
+            written = self._engine().overwrite_file(filepath, remove=not group,
+                                                    start_pass=min(start_pass, len(schedule.passes)),
+                                                    start_offset=start_offset, checkpoint=checkpoint,
+                                                    schedule=schedule)
+        if group:
+            self._add_to_batch(st_dev, filepath, written)
+        else:
+            self._file_done(filepath)
+        return filepath
+
+    def _file_done(self, filepath):
+        """Count a file once it is durably wiped and gone, and mark it done in the journal"""
+        if self.journal is not None:
+            self.journal.done(filepath)
+        with self._lock:
+            self.files_done += 1
+
+    def _add_to_batch(self, st_dev, filepath, nbytes):
+        with self._lock:
+            batch = self._batches.setdefault(st_dev, {"paths": [], "bytes": 0})
+            batch["paths"].append(filepath)
+            batch["bytes"] += nbytes
+            if len(batch["paths"]) < GROUP_COMMIT_FILES and batch["bytes"] < GROUP_COMMIT_BYTES:
+                return
+            del self._batches[st_dev]
+        self._commit_batch(batch["paths"])
+
+    def _commit_batch(self, paths):
+        """
+        syncfs the device once for a whole batch, then unlink its files.
+
+        Files only count as wiped once they are committed and removed. If the
+        syncfs fails, every file of the batch is reported and left in place,
+        still unfinished in the journal, so a resumed wipe overwrites it again.
+        """
+        try:
+            fd = os.open(paths[0], os.O_RDONLY)
+            try:
+                syncfs(fd)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            for filepath in paths:
+                self._report(filepath, e)
+            return
+        with self._lock:
+            self.group_commits += 1
+        for filepath in paths:
+            try:
+                os.remove(filepath)
+            except OSError as e:
+                self._report(filepath, e)
+                continue
+            self._file_done(filepath)
+
+    def _report(self, filepath, error):
+        if self._on_error:
+            self._on_error(filepath, error)
+
+    def wipe_files(self, filepaths, passes=1, pattern="random", on_error=None, schedule=None):
+        """
+        Wipe every path from an iterable, which may be a lazy os.walk generator,
+        with `passes` passes of `pattern` or with a pass schedule.
+
+        Submission is windowed so a huge tree never queues more than a few
+        futures per worker. Returns the number of files wiped successfully;
+        under the "device" policy a file only counts once its batch commits.
+        """
+        schedule = schedule or pattern_schedule(pattern, passes)
+        window = self.max_workers * 4
+        pending = {}
+        self._on_error = on_error
+        self.files_done = 0
+
+        def reap(done):
+            for future in done:
+                filepath = pending.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    if on_error:
+                        on_error(filepath, e)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for filepath in filepaths:
+                if len(pending) >= window:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    reap(done)
+                pending[pool.submit(self._wipe_one, filepath, schedule)] = filepath
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                reap(done)
+        # Commit whatever is left in partially filled device batches
+        batches, self._batches = self._batches, {}
+        for batch in batches.values():
+            self._commit_batch(batch["paths"])
+        return self.files_done
+
+
+def iter_files(mountpoint):
+    """Yield every regular file path below a mountpoint"""
+    for root, dirs, files in os.walk(mountpoint):
+        for name in files:
+            yield os.path.join(root, name)
+
+
+def pipelined(items, stage, depth=PIPELINE_DEPTH):
+    """
+    Yield items from an iterable after stage(item) has run on each of them.
+
+    The iterable and the stage run on a background thread, so while the
+    consumer works on item k the stage is already handling item k+1. A bounded
+    queue keeps the stage at most `depth` items ahead; an exception raised by
+    the iterable or the stage is re-raised to the consumer.
+    """
+    q = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+    finished = object()
+    errors = []
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                stage(item)
+                if not put(item):
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            put(finished)
+
+    producer = threading.Thread(target=produce, name="wipe-pipeline", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = q.get()
+            if item is finished:
+                break
+            yield item
+        if errors:
+            raise errors[0]
+    finally:
+        # Also runs when the consumer stops early; unblocks a producer waiting on a full queue
+        stop.set()
+        producer.join()
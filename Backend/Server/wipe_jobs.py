@@ -0,0 +1,174 @@
+"""
+Wipe Job Manager
+Runs long wipes on background worker threads behind a bounded queue and
+exposes their live progress for polling and Server-Sent Events
+"""
+import os
+import time
+import uuid
+import queue
+import threading
+import traceback
+from datetime import datetime
+
+JOB_WORKERS = int(os.getenv("WIPE_JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("WIPE_JOB_QUEUE_SIZE", "16"))
+# Finished jobs are kept this long so clients can still collect the certificate
+JOB_RETENTION_SECONDS = 24 * 3600
+
+
+class JobQueueFull(Exception):
+    """Raised when no more jobs can be queued"""
+
+
+class WipeJob:
+    """State of one background wipe; progress is pulled from a tracker callable"""
+
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.created = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.started_at = None
+        self.finished_at = None
+        self.bytes_total = None
+        self.files_total = None
+        self.result = None
+        self.error = None
+        self._tracker = None
+        self._final_progress = {}
+        self._lock = threading.Lock()
+
+    def track(self, tracker, bytes_total=None, files_total=None):
+        """Attach a callable returning {"bytes_done", "files_done"} for live progress"""
+        with self._lock:
+            self._tracker = tracker
+            if bytes_total is not None:
+                self.bytes_total = bytes_total
+            if files_total is not None:
+                self.files_total = files_total
+
+    def _progress(self):
+        if self._tracker is None:
+            return dict(self._final_progress)
+        try:
+            return self._tracker()
+        except Exception:
+            return dict(self._final_progress)
+
+    @property
+    def finished(self):
+        return self.status in ("completed", "failed")
+
+    def snapshot(self):
+        with self._lock:
+            progress = self._progress()
+            bytes_done = progress.get("bytes_done", 0)
+            elapsed = None
+            throughput = None
+            eta = None
+            if self.started_at is not None:
+                end = self.finished_at or time.monotonic()
+                elapsed = max(end - self.started_at, 1e-9)
+                throughput = bytes_done / elapsed
+                if self.bytes_total and throughput > 0 and not self.finished:
+                    eta = max(self.bytes_total - bytes_done, 0) / throughput
+            snap = {
+                "id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "created": self.created,
+                "bytes_done": bytes_done,
+                "bytes_total": self.bytes_total,
+                "files_done": progress.get("files_done", 0),
+                "files_total": self.files_total,
+                "elapsed_seconds": elapsed,
+                "throughput": throughput,
+                "eta_seconds": eta,
+            }
+            if self.result is not None:
+                snap["certificate"] = self.result.get("certificate")
+                snap["result"] = self.result
+            if self.error is not None:
+                snap["error"] = self.error
+            return snap
+
+    def _start(self):
+        with self._lock:
+            self.status = "running"
+            self.started_at = time.monotonic()
+
+    def _finish(self, result=None, error=None):
+        with self._lock:
+            # Freeze the last progress reading so the tracker's objects can be released
+            self._final_progress = self._progress()
+            self._tracker = None
+            self.result = result
+            self.error = error
+            self.status = "failed" if error is not None else "completed"
+            self.finished_at = time.monotonic()
+
+
+class JobManager:
+    """
+    Bounded queue of wipe jobs served by a fixed set of worker threads.
+
+    submit() never blocks: when the queue is full it raises JobQueueFull so the
+    API can answer 503 instead of tying up a request worker.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_queue=JOB_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=max(1, max_queue))
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._workers = []
+        for i in range(max(1, workers)):
+            t = threading.Thread(target=self._worker, name=f"wipe-job-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    def submit(self, kind, fn, params=None):
+        """
+        Queue fn(job) to run in the background; its return value becomes job.result.
+
+        Returns:
+            WipeJob: The queued job
+        """
+        job = WipeJob(kind, params or {})
+        try:
+            self._queue.put_nowait((job, fn))
+        except queue.Full:
+            raise JobQueueFull(f"Wipe queue is full ({self._queue.maxsize} jobs); try again later")
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.snapshot() for job in jobs]
+
+    def _prune(self):
+        cutoff = time.monotonic() - JOB_RETENTION_SECONDS
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _worker(self):
+        while True:
+            job, fn = self._queue.get()
+            job._start()
+            try:
+                job._finish(result=fn(job))
+            except Exception as e:
+                detail = getattr(e, "detail", None) or str(e)
+                print(f"Wipe job {job.id} failed: {detail}")
+                traceback.print_exc()
+                job._finish(error=detail)
+            finally:
+                self._queue.task_done()
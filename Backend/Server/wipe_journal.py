@@ -0,0 +1,159 @@
+"""
+Wipe Checkpoint Journal
+Write-ahead record of wipe progress in SQLite so a wipe interrupted by a
+server restart resumes from its last durable checkpoint instead of pass 1
+"""
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from datetime import datetime
+
+JOURNAL_PATH = os.getenv("WIPE_JOURNAL_PATH", "wipe_journal.sqlite")
+JOURNAL_ENABLED = os.getenv("WIPE_JOURNAL", "1") != "0"
+# Interrupted wipes are only re-run at startup when this is switched on
+JOURNAL_AUTO_RESUME = os.getenv("WIPE_AUTO_RESUME", "0") == "1"
+# Buffered checkpoints are committed in one transaction at most this often
+JOURNAL_COMMIT_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wipes (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created TEXT NOT NULL,
+    resumes TEXT NOT NULL DEFAULT '[]'
+);
+CREATE TABLE IF NOT EXISTS files (
+    wipe_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    pass INTEGER NOT NULL DEFAULT 0,
+    offset INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (wipe_id, path)
+);
+"""
+
+
+class WipeJournal:
+    """
+    SQLite checkpoint journal shared by all wipes of one server.
+
+    Checkpoints are buffered in memory and committed together, so a wipe
+    checkpointing from many worker threads costs one small transaction per
+    JOURNAL_COMMIT_INTERVAL rather than one per checkpoint.
+    """
+
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_commit = time.monotonic()
+
+    def _commit_locked(self):
+        if self._pending:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO files (wipe_id, path, pass, offset, done) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(wipe_id, path) DO UPDATE SET "
+                "pass = excluded.pass, offset = excluded.offset, done = excluded.done",
+                [(w, p, ps, off, d) for (w, p), (ps, off, d) in self._pending.items()]
+            )
+            self._conn.execute("COMMIT")
+            self._pending.clear()
+        self._last_commit = time.monotonic()
+
+    def _record(self, wipe_id, path, pass_no, offset, done):
+        with self._lock:
+            self._pending[(wipe_id, path)] = (pass_no, offset, int(done))
+            if time.monotonic() - self._last_commit >= JOURNAL_COMMIT_INTERVAL:
+                self._commit_locked()
+
+    def flush(self):
+        with self._lock:
+            self._commit_locked()
+
+    def start(self, kind, params):
+        """Register a new wipe and return a session for it"""
+        wipe_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO wipes (id, kind, params, status, created) VALUES (?, ?, ?, 'running', ?)",
+                (wipe_id, kind, json.dumps(params), datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+        return JournalSession(self, wipe_id, kind, params, [])
+
+    def unfinished(self):
+        """Sessions for every wipe that was still running when the server stopped"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, params, resumes FROM wipes WHERE status = 'running'"
+            ).fetchall()
+        return [JournalSession(self, wid, kind, json.loads(params), json.loads(resumes))
+                for wid, kind, params, resumes in rows]
+
+    def _update_wipe(self, wipe_id, **fields):
+        sets = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock:
+            self._commit_locked()
+            self._conn.execute(f"UPDATE wipes SET {sets} WHERE id = ?", (*fields.values(), wipe_id))
+
+    def _load_files(self, wipe_id):
+        with self._lock:
+            self._commit_locked()
+            rows = self._conn.execute(
+                "SELECT path, pass, offset, done FROM files WHERE wipe_id = ?", (wipe_id,)
+            ).fetchall()
+        return {path: (pass_no, offset, bool(done)) for path, pass_no, offset, done in rows}
+
+    def _forget_files(self, wipe_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE wipe_id = ?", (wipe_id,))
+
+
+class JournalSession:
+    """Checkpoint view of one wipe, handed to the executor and the wipe runners"""
+
+    def __init__(self, journal, wipe_id, kind, params, resumes):
+        self.journal = journal
+        self.id = wipe_id
+        self.kind = kind
+        self.params = params
+        self.resumes = resumes
+        self._files = {}
+
+    @property
+    def resumed(self):
+        return bool(self.resumes)
+
+    def mark_resumed(self):
+        """Record a resumption and load the per-file checkpoints left by earlier runs"""
+        self.resumes.append(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        self.journal._update_wipe(self.id, resumes=json.dumps(self.resumes))
+        self._files = self.journal._load_files(self.id)
+
+    def update_params(self, **params):
+        self.params.update(params)
+        self.journal._update_wipe(self.id, params=json.dumps(self.params))
+
+    def resume_point(self, path):
+        """(pass, offset, done) recorded for a path by an earlier run, or None"""
+        return self._files.get(path)
+
+    def checkpoint(self, path, pass_no, offset):
+        self.journal._record(self.id, path, pass_no, offset, False)
+
+    def done(self, path):
+        self.journal._record(self.id, path, 0, 0, True)
+
+    def finish(self, status="completed"):
+        """Close the wipe; its per-file rows are no longer needed"""
+        self.journal._update_wipe(self.id, status=status)
+        self.journal._forget_files(self.id)
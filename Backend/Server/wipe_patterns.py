@@ -0,0 +1,129 @@
+"""
+Selective Wipe Pattern Matcher
+Compiles a request's glob patterns once (a suffix set for plain *.ext globs
+and one combined regex for the rest) and prunes directories no pattern can
+reach, so building a wipe plan stays fast on large trees
+"""
+import os
+import re
+import fnmatch
+
+_MAGIC = re.compile(r"[*?[]")
+
+
+def _is_magic(text):
+    return _MAGIC.search(text) is not None
+
+
+def _combine(patterns):
+    """One compiled regex matching any of the globs, or None if there are none"""
+    parts = []
+    for pat in patterns:
+        translated = fnmatch.translate(pat)
+        try:
+            re.compile(translated)
+        except re.error as e:
+            print(f"Skipping invalid pattern {pat!r}: {e}")
+            continue
+        parts.append(f"(?:{translated})")
+    return re.compile("|".join(parts)) if parts else None
+
+
+class PatternMatcher:
+    """
+    Matches files under `root` against glob patterns with fnmatch semantics.
+
+    A pattern matches a file if it matches the file name or the full path
+    ("*" also crosses directory separators). Patterns with a separator that
+    do not start with a wildcard, like "DCIM/**", are anchored at `root`.
+    When every pattern is anchored below a literal directory prefix, walk()
+    skips subtrees outside all of those prefixes.
+    """
+
+    def __init__(self, patterns, root):
+        self.root = root
+        self._anchor = os.path.normcase(os.path.abspath(root))
+        suffixes = set()
+        name_globs = []
+        path_globs = []
+        prefixes = []
+        # Prefixes are absolute, so only a walk from an absolute root can be pruned
+        self.prunable = os.path.isabs(root)
+        for pat in patterns:
+            if not pat:
+                continue
+            pat = os.path.normcase(pat)
+            if os.sep not in pat:
+                if pat.startswith("*.") and not _is_magic(pat[1:]):
+                    # "*.ext" matches exactly the names ending in ".ext", whole path or not
+                    suffixes.add(pat[1:])
+                else:
+                    name_globs.append(pat)
+                    if _is_magic(pat[0]):
+                        # Only a leading wildcard can match the separators of a full path
+                        path_globs.append(pat)
+                self.prunable = False
+                continue
+            if os.path.isabs(pat):
+                path_globs.append(pat)
+                prefixes.append(self._literal_prefix(pat))
+                continue
+            if _is_magic(pat[0]):
+                # A leading wildcard can swallow any absolute prefix, root included
+                path_globs.append(pat)
+                self.prunable = False
+                continue
+            # A literal start can never match an absolute path, so anchor it at root
+            anchored = os.path.join(self._anchor, pat)
+            path_globs.append(anchored)
+            prefixes.append(self._literal_prefix(anchored))
+        self.suffixes = tuple(sorted(suffixes))
+        self._name_re = _combine(name_globs)
+        self._path_re = _combine(path_globs)
+        self._prefixes = prefixes
+        if any(len(p) <= len(self._split(self._anchor)) for p in prefixes):
+            self.prunable = False
+
+    @staticmethod
+    def _split(path):
+        return [part for part in path.split(os.sep) if part]
+
+    def _literal_prefix(self, pattern):
+        """Leading directory components of a pattern that contain no wildcards"""
+        parts = self._split(pattern)[:-1]
+        prefix = []
+        for part in parts:
+            if _is_magic(part):
+                break
+            prefix.append(part)
+        return prefix
+
+    def match(self, path, name):
+        """Whether the file at `path` (named `name`) is selected"""
+        name = os.path.normcase(name)
+        if self.suffixes and name.endswith(self.suffixes):
+            return True
+        if self._name_re is not None and self._name_re.match(name):
+            return True
+        return self._path_re is not None and self._path_re.match(os.path.normcase(path)) is not None
+
+    def could_match_under(self, dirpath):
+        """False only when no pattern can match anything below dirpath"""
+        if not self.prunable:
+            return True
+        parts = self._split(os.path.normcase(dirpath))
+        for prefix in self._prefixes:
+            common = min(len(parts), len(prefix))
+            if parts[:common] == prefix[:common]:
+                return True
+        return False
+
+    def walk(self):
+        """Yield the path of every matching file under root, pruning dead subtrees"""
+        for dirpath, dirs, files in os.walk(self.root):
+            if self.prunable:
+                dirs[:] = [d for d in dirs if self.could_match_under(os.path.join(dirpath, d))]
+            for name in files:
+                path = os.path.join(dirpath, name)
+                if self.match(path, name):
+                    yield path
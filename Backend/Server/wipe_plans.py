@@ -0,0 +1,192 @@
+"""
+Selective Wipe Plans
+Dry runs of /wipe-selective save their matches as a plan on disk; a later
+real run with the plan's token wipes exactly those files without walking the
+device again, after re-checking each one for drift. A real run streams the
+files it is about to wipe into a wipe list, which its journal entry points at
+so an interrupted wipe resumes over the same files
+"""
+import os
+import re
+import gzip
+import json
+import time
+import secrets
+import threading
+
+PLAN_DIR = os.getenv("WIPE_PLAN_DIR", "wipe_plans")
+PLAN_TTL_SECONDS = int(os.getenv("WIPE_PLAN_TTL_SECONDS", "3600"))
+# Drift reports list at most this many paths; the counts are always complete
+DRIFT_REPORT_LIMIT = 100
+
+_TOKEN_RE = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+
+class PlanNotFound(Exception):
+    """Raised for an unknown or malformed plan token"""
+
+
+class PlanExpired(Exception):
+    """Raised when a plan is older than its TTL"""
+
+
+def file_identity(st):
+    """The (inode, size, mtime) triple a plan records to detect drift"""
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _unchanged(entries, drift):
+    """Yield the planned paths whose identity still matches, counting the rest into drift"""
+    for file_path, identity in entries:
+        try:
+            current = file_identity(os.stat(file_path))
+        except FileNotFoundError:
+            kind = "missing"
+        else:
+            if current == identity:
+                yield file_path
+                continue
+            kind = "changed"
+        drift[kind] += 1
+        if len(drift["files"]) < DRIFT_REPORT_LIMIT:
+            drift["files"].append({"path": file_path, "drift": kind})
+
+
+class PlanStore:
+    """
+    Plans as gzip files of one line per file: inode, size, mtime_ns and the
+    JSON-quoted path, after a JSON header line. Entries are streamed in and
+    out, so a plan of millions of files never has to sit in server memory.
+    """
+
+    def __init__(self, directory=PLAN_DIR, ttl=PLAN_TTL_SECONDS):
+        self.directory = directory
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, token):
+        if not token or not _TOKEN_RE.match(token):
+            raise PlanNotFound("Invalid plan token")
+        return os.path.join(self.directory, f"{token}.plan.gz")
+
+    def prune(self):
+        """Delete plans past their TTL (by file age, without opening them)"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                try:
+                    if name.endswith(".plan.gz") and os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
+
+    def create(self, mountpoint, patterns, paths):
+        """
+        Stat and record every path from an iterable as a new plan.
+
+        Returns:
+            tuple: (token, expires epoch seconds, list of recorded paths)
+        """
+        self.prune()
+        token = secrets.token_urlsafe(16)
+        path = self._path(token)
+        created = time.time()
+        header = {"version": 1, "mountpoint": mountpoint, "patterns": list(patterns),
+                  "created": created, "expires": created + self.ttl}
+        recorded = []
+        tmp = path + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8", errors="surrogateescape") as f:
+            f.write(json.dumps(header) + "\n")
+            for file_path in paths:
+                try:
+                    ino, size, mtime_ns = file_identity(os.stat(file_path))
+                except OSError:
+                    continue
+                f.write(f"{ino} {size} {mtime_ns} {json.dumps(file_path)}\n")
+                recorded.append(file_path)
+        # Only complete plans become visible under their token
+        os.replace(tmp, path)
+        return token, header["expires"], recorded
+
+    def open(self, token):
+        """
+        Read a plan's header and an iterator over its (path, identity) entries.
+
+        Raises:
+            PlanNotFound: Unknown token
+            PlanExpired: The plan outlived its TTL (it is deleted)
+        """
+        path = self._path(token)
+        try:
+            f = gzip.open(path, "rt", encoding="utf-8", errors="surrogateescape")
+            header = json.loads(f.readline())
+        except FileNotFoundError:
+            raise PlanNotFound("Plan not found; it may have been used already or expired")
+        if time.time() > header.get("expires", 0):
+            f.close()
+            self.discard(token)
+            raise PlanExpired("Plan expired; run the dry run again")
+
+        def entries():
+            with f:
+                for line in f:
+                    ino, size, mtime_ns, quoted = line.rstrip("\n").split(" ", 3)
+                    yield json.loads(quoted), (int(ino), int(size), int(mtime_ns))
+
+        return header, entries()
+
+    def check(self, token):
+        """
+        Re-stat every planned file and split the plan by drift.
+
+        Returns:
+            tuple: (header, unchanged paths, drift report dict)
+        """
+        header, entries = self.open(token)
+        drift = {"missing": 0, "changed": 0, "files": []}
+        return header, list(_unchanged(entries, drift)), drift
+
+    def snapshot(self, token):
+        """
+        Re-check a plan for drift and stream its unchanged files into a new
+        wipe list. The plan itself is left in place.
+
+        Returns:
+            tuple: (header, wipe list path, drift report dict)
+        """
+        header, entries = self.open(token)
+        drift = {"missing": 0, "changed": 0, "files": []}
+        return header, self.write_list(_unchanged(entries, drift)), drift
+
+    def write_list(self, paths):
+        """Stream every path from an iterable into a new wipe list and return its path"""
+        path = os.path.join(self.directory, f"{secrets.token_urlsafe(16)}.wipe.gz")
+        tmp = path + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8", errors="surrogateescape") as f:
+            for file_path in paths:
+                f.write(json.dumps(file_path) + "\n")
+        os.replace(tmp, path)
+        return path
+
+    @staticmethod
+    def read_list(path):
+        """Yield the paths of a wipe list; wipe lists do not expire"""
+        with gzip.open(path, "rt", encoding="utf-8", errors="surrogateescape") as f:
+            for line in f:
+                yield json.loads(line)
+
+    @staticmethod
+    def discard_list(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def discard(self, token):
+        try:
+            os.remove(self._path(token))
+        except (OSError, PlanNotFound):
+            pass
+
@@ -0,0 +1,150 @@
+"""
+Wipe Pass Schedules
+Named overwrite schedules (NIST SP 800-88 Clear, DoD 5220.22-M, Gutmann, ...)
+built from fixed-pattern, complement, random and verify passes
+"""
+
+RANDOM = "random"
+FIXED = "fixed"
+VERIFY = "verify"
+
+
+class PassSpec:
+    """One step of a schedule: write random data, write a fixed pattern, or verify the last write"""
+
+    def __init__(self, kind, pattern=None):
+        self.kind = kind
+        self.pattern = pattern
+
+    @property
+    def writes(self):
+        return self.kind != VERIFY
+
+    def describe(self):
+        if self.kind == FIXED:
+            return self.pattern.hex()
+        return self.kind
+
+    def __eq__(self, other):
+        return isinstance(other, PassSpec) and (self.kind, self.pattern) == (other.kind, other.pattern)
+
+    def __hash__(self):
+        return hash((self.kind, self.pattern))
+
+    def __repr__(self):
+        return f"PassSpec({self.describe()})"
+
+
+def fixed(*pattern):
+    return PassSpec(FIXED, bytes(pattern))
+
+
+def random_pass():
+    return PassSpec(RANDOM)
+
+
+def verify():
+    return PassSpec(VERIFY)
+
+
+COMPLEMENT = "complement"   # placeholder resolved against the previous fixed pass
+
+
+def _resolve(steps):
+    """Expand COMPLEMENT placeholders into the bitwise inverse of the preceding fixed pattern"""
+    passes = []
+    for step in steps:
+        if step == COMPLEMENT:
+            previous = next(p for p in reversed(passes) if p.kind == FIXED)
+            step = PassSpec(FIXED, bytes(b ^ 0xFF for b in previous.pattern))
+        passes.append(step)
+    return passes
+
+
+_GUTMANN_FIXED = [
+    (0x55,), (0xAA,), (0x92, 0x49, 0x24), (0x49, 0x24, 0x92), (0x24, 0x92, 0x49),
+    *[(b * 0x11,) for b in range(16)],
+    (0x92, 0x49, 0x24), (0x49, 0x24, 0x92), (0x24, 0x92, 0x49),
+    (0x6D, 0xB6, 0xDB), (0xB6, 0xDB, 0x6D), (0xDB, 0x6D, 0xB6),
+]
+
+_DOD_E = [fixed(0x00), COMPLEMENT, random_pass()]
+
+# name -> (certificate label, steps, counts as DoD 5220.22-M)
+SCHEDULES = {
+    "nist-clear": ("NIST SP 800-88 Clear", [fixed(0x00), verify()], False),
+    "dod-5220.22-m": ("DoD 5220.22-M", _DOD_E + [verify()], True),
+    "dod-5220.22-m-ece": ("DoD 5220.22-M ECE", _DOD_E + [random_pass()] + _DOD_E + [verify()], True),
+    "gutmann": ("Gutmann", [random_pass()] * 4 + [fixed(*p) for p in _GUTMANN_FIXED] + [random_pass()] * 4,
+                False),
+}
+DOD_SCHEDULES = {name for name, (_, _, dod) in SCHEDULES.items() if dod}
+
+# Simple single-pattern schedules repeated `passes` times
+PATTERN_PASSES = {
+    "random": random_pass(),
+    "zeros": fixed(0x00),
+    "ones": fixed(0xFF),
+}
+
+
+class Schedule:
+    """An ordered list of PassSpecs plus the name and label recorded on certificates"""
+
+    def __init__(self, name, label, passes, dod=False):
+        self.name = name
+        self.label = label
+        self.passes = passes
+        self.dod = dod
+
+    @property
+    def write_passes(self):
+        return sum(1 for p in self.passes if p.writes)
+
+    def describe(self):
+        return [p.describe() for p in self.passes]
+
+    def fixed_patterns(self):
+        return {p.pattern for p in self.passes if p.kind == FIXED}
+
+
+def pattern_schedule(pattern="random", passes=1):
+    """The legacy behaviour: the same pattern `passes` times"""
+    if pattern not in PATTERN_PASSES:
+        raise ValueError(f"Unknown pass pattern '{pattern}'. Use one of: {', '.join(PATTERN_PASSES)}")
+    passes = max(1, int(passes))
+    return Schedule(pattern, f"{passes}-pass {pattern}", [PATTERN_PASSES[pattern]] * passes)
+
+
+def get_schedule(name, passes=1):
+    """
+    Look up a schedule by name.
+
+    Standard schedules have a fixed pass list; "random", "zeros" and "ones"
+    repeat their pattern `passes` times.
+    """
+    key = (name or "random").lower()
+    if key in PATTERN_PASSES:
+        return pattern_schedule(key, passes)
+    if key not in SCHEDULES:
+        names = list(SCHEDULES) + list(PATTERN_PASSES)
+        raise ValueError(f"Unknown wipe schedule '{name}'. Use one of: {', '.join(names)}")
+    label, steps, dod = SCHEDULES[key]
+    return Schedule(key, label, _resolve(steps), dod)
+
+
+def schedule_from_wipe_method(method):
+    """
+    Map a settings wipeMethod ("3-pass", "single-pass", "dod-5220.22-m-direct", ...)
+    to a schedule, or None when it does not name one.
+    """
+    method = (method or "").lower()
+    if method.endswith("-direct"):
+        method = method[:-len("-direct")]
+    if method == "single-pass":
+        return pattern_schedule("random", 1)
+    if method.endswith("-pass") and method[:-len("-pass")].isdigit():
+        return pattern_schedule("random", int(method[:-len("-pass")]))
+    if method in SCHEDULES:
+        return get_schedule(method)
+    return None
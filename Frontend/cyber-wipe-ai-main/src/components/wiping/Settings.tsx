@@ -118,6 +118,12 @@ export default function Settings() {
               <SelectItem value="single-pass">Single Pass</SelectItem>
               <SelectItem value="3-pass">3-Pass</SelectItem>
               <SelectItem value="7-pass">7-Pass</SelectItem>
+              <SelectItem value="3-pass-direct">3-Pass (Direct I/O)</SelectItem>
+              <SelectItem value="7-pass-direct">7-Pass (Direct I/O)</SelectItem>
+              <SelectItem value="nist-clear">NIST SP 800-88 Clear</SelectItem>
+              <SelectItem value="dod-5220.22-m">DoD 5220.22-M (3-Pass + Verify)</SelectItem>
+              <SelectItem value="dod-5220.22-m-ece">DoD 5220.22-M ECE (7-Pass + Verify)</SelectItem>
+              <SelectItem value="gutmann">Gutmann (35-Pass)</SelectItem>
               <SelectItem value="crypto-erase">Cryptographic Erase</SelectItem>
             </SelectContent>
           </Select>